@@ -0,0 +1,56 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+
+def fingerprint(body: Dict[str, Any]) -> str:
+    """Stable hash of a request body, used to detect a key reused for a different request."""
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Bounded TTL store of responses by Idempotency-Key.
+
+    Entries expire after `ttl` seconds; beyond `max_keys` the oldest entries
+    are evicted. `lock` serializes check-and-create so concurrent duplicates
+    cannot both do the work.
+    """
+
+    def __init__(self, ttl: float, max_keys: int):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[float, str, Any, int]]" = OrderedDict()
+
+    def _purge_expired(self, now: float) -> None:
+        while self._entries:
+            key, (expires_at, _, _, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
+
+    def get(self, key: str) -> Optional[Tuple[str, Any, int]]:
+        """Return (fingerprint, response, status) stored for `key`, if still valid."""
+        with self.lock:
+            self._purge_expired(time.monotonic())
+            entry = self._entries.get(key)
+            return entry[1:] if entry else None
+
+    def put(self, key: str, body_fingerprint: str, response: Any, status: int) -> None:
+        with self.lock:
+            # Insertion order equals expiry order since the TTL is fixed
+            self._entries[key] = (time.monotonic() + self.ttl, body_fingerprint, response, status)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+
+idempotency_store = IdempotencyStore(IDEMPOTENCY_TTL, IDEMPOTENCY_MAX_KEYS)
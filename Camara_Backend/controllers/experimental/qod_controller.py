@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 from typing import Dict, Any
 import uuid
+from connexion import request
+from controllers.experimental.idempotency import idempotency_store, fingerprint
 
 # In-memory session storage
 sessions_db: Dict[str, Dict[str, Any]] = {}
@@ -13,8 +15,45 @@ class QoSStatus:
 def create_session(body: Dict[str, Any]) -> tuple:
     """
     POST /sessions
-    Create a new QoS session
+    Create a new QoS session. A repeated Idempotency-Key replays the original
+    response instead of creating another session.
     """
+    key = request.headers.get("Idempotency-Key")
+    if not key:
+        return _create_session(body)
+
+    body_fingerprint = fingerprint(body)
+    with idempotency_store.lock:
+        stored = idempotency_store.get(key)
+        if stored:
+            stored_fingerprint, response, status = stored
+            if stored_fingerprint != body_fingerprint:
+                return {
+                    "status": 422,
+                    "code": "IDEMPOTENCY_KEY_MISMATCH",
+                    "message": "Idempotency-Key was already used with a different request body"
+                }, 422
+            return response, status, {"Idempotent-Replayed": "true"}
+
+        response, status = _create_session(body)
+        if status == 201:
+            idempotency_store.put(key, body_fingerprint, response, status)
+        return response, status
+
+
+def create_sessions_batch(body: Dict[str, Any]) -> tuple:
+    """
+    POST /sessions/batch
+    Create several QoS sessions; each item succeeds or fails on its own.
+    """
+    results = []
+    for item in body.get("sessions", []):
+        response, status = _create_session(item)
+        results.append({"status": status, "session" if status == 201 else "error": response})
+    return {"results": results}, 200
+
+
+def _create_session(body: Dict[str, Any]) -> tuple:
     try:
         session_id = str(uuid.uuid4())
         device = body.get("device", {})
@@ -1,22 +1,80 @@
+import asyncio
 import logging
+import signal
+import uvicorn
 from fastmcp import FastMCP
-from MCP_dummy_Camara.tools.qod import create_qod_session, get_qod_session, delete_qod_session, list_qod_sessions
-from MCP_dummy_Camara.tools.edge_application import get_app_definitions
-from MCP_dummy_Camara.tools.location_verification import verify_device_location
-from dotenv import load_dotenv
+from fastmcp.server.http import create_streamable_http_app
+import MCP_dummy_Camara.config  # noqa: F401  loads .env once
+from MCP_dummy_Camara.tool_registry import ToolSpec, register_tools
+from MCP_dummy_Camara.metrics import tool_metrics
+from MCP_dummy_Camara import http_client
+from MCP_dummy_Camara.templates import templates
+from MCP_dummy_Camara.tool_logging import configure_logging
+from MCP_dummy_Camara.session_store import create_event_store
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 import os
 
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
+configure_logging()
 logger = logging.getLogger("MCP server")
 
 app = FastMCP("MCP Server")
-load_dotenv()
 
+# Stateless mode serves every request on a fresh transport, so replicas need no
+# session affinity; otherwise MCP_EVENT_STORE makes streams resumable.
+STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "false").lower() in ("1", "true", "yes")
+EVENT_STORE = os.getenv("MCP_EVENT_STORE", "")
+EVENT_TTL = float(os.getenv("MCP_EVENT_TTL", "3600"))
 
-SAFE_TOOLS = [create_qod_session, get_qod_session, delete_qod_session, get_app_definitions, list_qod_sessions]
+QOD_TOOLS = "MCP_dummy_Camara.tools.qod"
+
+# Rarely used tools are lazy: advertised from the build-time schema cache and
+# only imported on their first call
+TOOLS = [
+    ToolSpec(QOD_TOOLS, "create_qod_session"),
+    ToolSpec(QOD_TOOLS, "create_qod_sessions_bulk"),
+    ToolSpec(QOD_TOOLS, "get_qod_session"),
+    ToolSpec(QOD_TOOLS, "delete_qod_session"),
+    ToolSpec("MCP_dummy_Camara.tools.edge_application", "get_app_definitions", lazy=True),
+    ToolSpec(QOD_TOOLS, "list_qod_sessions"),
+]
+
+register_tools(app, TOOLS)
+
+# Time every registered tool call and expose the histograms for Prometheus
+tool_metrics.instrument_server(app._mcp_server)
+
+
+@app.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(tool_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def http_app():
+    """ASGI app for the streamable-HTTP transport (`uvicorn --factory MCP_dummy_Camara.app:http_app`)."""
+    if STATELESS_HTTP and EVENT_STORE:
+        logger.warning("MCP_EVENT_STORE is ignored in stateless mode")
+    return create_streamable_http_app(
+        server=app,
+        streamable_http_path="/mcp",
+        event_store=None if STATELESS_HTTP else create_event_store(EVENT_STORE, ttl=EVENT_TTL),
+        stateless_http=STATELESS_HTTP,
+    )
+
+
+async def serve(host: str, port: int):
+    # The pooled backend client lives exactly as long as the server
+    await http_client.startup()
+    if hasattr(signal, "SIGHUP"):
+        # `kill -HUP <pid>` reloads edited JSON templates without a restart
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, templates.reload_if_changed)
+    try:
+        logger.info("Serving MCP on http://%s:%d/mcp (stateless=%s)", host, port, STATELESS_HTTP)
+        config = uvicorn.Config(http_app(), host=host, port=port, lifespan="on", timeout_graceful_shutdown=0)
+        await uvicorn.Server(config).serve()
+    finally:
+        await http_client.shutdown()
 
-for tool in SAFE_TOOLS:
-    app.tool()(tool)
 
 if __name__ == "__main__":
     logger.info("Starting MCP Server (proxy mode)...")
@@ -24,6 +82,6 @@ if __name__ == "__main__":
     port = int(os.getenv("MCP_PORT", "8001"))
     try:
         # default IP:127.0.0.1 and port 8000
-        app.run(transport="streamable-http", host=host, port=port)
+        asyncio.run(serve(host, port))
     except Exception as e:
         logger.critical("MCP server crashed: %s", e, exc_info=True)
@@ -0,0 +1,59 @@
+"""
+Concurrency benchmark for the QoD tools.
+
+Starts a stub backend that answers after `--delay` seconds and issues `--calls`
+parallel create_qod_session calls through an in-memory MCP client. With
+non-blocking tools the wall time stays close to one backend round trip; a
+serialized event loop needs roughly calls x delay.
+
+    python -m MCP_dummy_Camara.benchmarks.concurrency_benchmark --calls 50 --delay 0.2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from MCP_dummy_Camara.benchmarks.stub_backend import start_stub_backend
+
+
+async def run(calls: int) -> float:
+    from fastmcp import Client
+    from MCP_dummy_Camara import http_client
+    from MCP_dummy_Camara.app import app
+
+    arguments = {"inp": {"device": {"phoneNumber": "+123456789"}, "qosProfile": "QOS_L", "duration": 60}}
+    await http_client.startup()
+    try:
+        async with Client(app) as client:
+            await client.call_tool("create_qod_session", arguments)  # warm the connection pool
+            started = time.perf_counter()
+            await asyncio.gather(*(client.call_tool("create_qod_session", arguments) for _ in range(calls)))
+            return time.perf_counter() - started
+    finally:
+        await http_client.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.2, help="backend latency per request (s)")
+    parser.add_argument("--max-ratio", type=float, default=0.25,
+                        help="fail if wall time exceeds this fraction of the serialized time")
+    args = parser.parse_args()
+
+    backend = start_stub_backend(args.delay)
+    os.environ["DUMMY_BACKEND_URL"] = f"http://127.0.0.1:{backend.server_port}"
+
+    elapsed = asyncio.run(run(args.calls))
+    serialized = args.calls * args.delay
+    print(f"{args.calls} parallel create_qod_session calls: {elapsed:.3f}s "
+          f"(serialized would be ~{serialized:.2f}s, {args.calls / elapsed:.1f} calls/s)")
+    backend.shutdown()
+    if elapsed > serialized * args.max_ratio:
+        print("FAIL: tool calls are being serialized on the event loop")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
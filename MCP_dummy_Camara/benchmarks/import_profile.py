@@ -0,0 +1,68 @@
+"""
+Import-time profile of the server.
+
+Runs `python -X importtime -c "import MCP_dummy_Camara.app"` in a fresh
+interpreter and reports the slowest imports, grouped by top-level package,
+plus the project's own modules.
+
+Tool modules registered through `tool_registry` are loaded with importlib,
+which `-X importtime` does not itemize; profile one with `--target`.
+
+    python -m MCP_dummy_Camara.benchmarks.import_profile --top 15
+    python -m MCP_dummy_Camara.benchmarks.import_profile --target MCP_dummy_Camara.tools.qod
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+TARGET = "MCP_dummy_Camara.app"
+
+
+def profile(target: str = TARGET) -> list:
+    """Return (self_us, cumulative_us, depth, module) for every import of `target`."""
+    env = dict(os.environ)
+    env.setdefault("DUMMY_BACKEND_URL", "http://127.0.0.1:9")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {target}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {target} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target", default=TARGET, help="module to import")
+    args = parser.parse_args()
+
+    rows = profile(args.target)
+    total = max(cumulative for _, cumulative, _, name in rows if name == args.target)
+    by_package = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {args.target}: {total / 1000:.1f} ms\n")
+    print("Top-level packages by self time:")
+    for package, micros in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {micros / 1000:8.1f} ms  {package}")
+
+    print("\nProject modules (self / cumulative):")
+    for self_us, cumulative_us, _, name in rows:
+        if name.startswith("MCP_dummy_Camara"):
+            print(f"  {self_us / 1000:8.1f} / {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Micro-benchmark of QoD request payload construction.
+
+Compares the previous per-call approach (stat, open and parse the JSON template,
+then mutate it) with `tools.qod._session_payload`, the frozen template and
+copy-on-write merge used by create_qod_session, both including JSON
+serialization of the payload.
+
+    DUMMY_BACKEND_URL=http://localhost python -m MCP_dummy_Camara.benchmarks.payload_benchmark --number 20000
+"""
+import argparse
+import json
+import timeit
+
+from MCP_dummy_Camara.models.qod_models import CreateQoDSessionInput
+from MCP_dummy_Camara.templates import TEMPLATE_DIR, dumps
+from MCP_dummy_Camara.tools.qod import _session_payload
+
+INPUT = CreateQoDSessionInput(device={"phoneNumber": "+123456789"}, qosProfile="QOS_L", duration=600)
+
+
+def build_from_disk() -> str:
+    json_path = TEMPLATE_DIR / "qod_request.json"
+    if not json_path.exists():
+        raise FileNotFoundError(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    template["device"].update(INPUT.device.model_dump(mode="json", exclude_unset=True))
+    template["qosProfile"] = INPUT.qosProfile
+    template["duration"] = INPUT.duration
+    return json.dumps(template)
+
+
+def build_copy_on_write() -> str:
+    return dumps(_session_payload(INPUT.device, INPUT.qosProfile, INPUT.duration))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    assert json.loads(build_from_disk()) == json.loads(build_copy_on_write())
+    for name, fn in (("disk + json.load", build_from_disk), ("frozen copy-on-write", build_copy_on_write)):
+        best = min(timeit.repeat(fn, number=args.number, repeat=5))
+        print(f"{name:<22} {best / args.number * 1e6:8.2f} us/payload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Multi-replica load test for the stateless streamable-HTTP mode.
+
+Starts a stub backend, then measures get_qod_session throughput against one
+server replica and against `--replicas` replicas started with
+MCP_STATELESS_HTTP=true. Load generator processes spread calls round-robin
+over the replicas with no session affinity, like a load balancer would.
+Fails if the speedup is below `--min-efficiency` of linear scaling (capped
+at the number of CPUs, since replicas cannot scale beyond them).
+
+    python -m MCP_dummy_Camara.benchmarks.replica_load_test --replicas 4 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from MCP_dummy_Camara.benchmarks.startup_benchmark import _free_port, _initialize
+from MCP_dummy_Camara.benchmarks.stub_backend import start_stub_backend
+
+CALL = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "tools/call",
+    "params": {"name": "get_qod_session", "arguments": {"inp": {"sessionId": "load-test"}}},
+}
+HEADERS = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+
+
+def _run_backend(delay: float, ports) -> None:
+    ports.put(start_stub_backend(delay).server_port)
+    while True:
+        time.sleep(3600)
+
+
+def start_replicas(count: int, backend_url: str) -> tuple[list, list]:
+    servers, ports = [], [_free_port() for _ in range(count)]
+    for port in ports:
+        env = dict(os.environ, MCP_HOST="127.0.0.1", MCP_PORT=str(port), MCP_STATELESS_HTTP="true",
+                   DUMMY_BACKEND_URL=backend_url, LOG_LEVEL="WARNING")
+        servers.append(subprocess.Popen([sys.executable, "-W", "ignore", "-m", "MCP_dummy_Camara.app"],
+                                        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    for server, port in zip(servers, ports):
+        deadline = time.monotonic() + 30
+        while not _initialize(port):
+            if server.poll() is not None or time.monotonic() > deadline:
+                stop_replicas(servers)
+                sys.exit(f"replica on port {port} failed to start")
+            time.sleep(0.05)
+    return servers, [f"http://127.0.0.1:{port}/mcp" for port in ports]
+
+
+def stop_replicas(servers) -> None:
+    for server in servers:
+        server.terminate()
+    for server in servers:
+        server.wait(timeout=10)
+
+
+async def _generate_load(urls: list, concurrency: int, seconds: float, offset: int) -> tuple[int, int]:
+    import httpx
+
+    body = json.dumps(CALL)
+    ok = failed = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        async def worker(index: int):
+            nonlocal ok, failed
+            while time.perf_counter() < deadline:
+                url = urls[index % len(urls)]
+                index += concurrency
+                try:
+                    response = await client.post(url, content=body, headers=HEADERS)
+                    if response.status_code == 200 and '"result"' in response.text and '"isError":true' not in response.text:
+                        ok += 1
+                    else:
+                        failed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+        await asyncio.gather(*(worker(offset + i) for i in range(concurrency)))
+    return ok, failed
+
+
+def _load_process(args) -> tuple[int, int]:
+    return asyncio.run(_generate_load(*args))
+
+
+def measure(urls: list, clients: int, concurrency: int, seconds: float) -> tuple[float, int]:
+    """Return (successful calls per second, failed calls) across `clients` load generator processes."""
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(_load_process, [(urls, concurrency, seconds, i) for i in range(clients)])
+    ok = sum(r[0] for r in results)
+    failed = sum(r[1] for r in results)
+    return ok / seconds, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0, help="load duration per measurement")
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="in-flight calls per load generator")
+    parser.add_argument("--delay", type=float, default=0.0, help="backend latency per request (s)")
+    parser.add_argument("--min-efficiency", type=float, default=0.7,
+                        help="fail if speedup is below this fraction of min(replicas, CPUs)")
+    args = parser.parse_args()
+
+    ports = multiprocessing.Queue()
+    backend = multiprocessing.Process(target=_run_backend, args=(args.delay, ports), daemon=True)
+    backend.start()
+    backend_url = f"http://127.0.0.1:{ports.get(timeout=10)}"
+
+    throughput = {}
+    try:
+        for count in sorted({1, args.replicas}):
+            servers, urls = start_replicas(count, backend_url)
+            try:
+                measure(urls, args.clients, args.concurrency, 1.0)  # warm up connections
+                throughput[count], failed = measure(urls, args.clients, args.concurrency, args.seconds)
+            finally:
+                stop_replicas(servers)
+            print(f"{count} replica(s): {throughput[count]:.1f} calls/s ({failed} failed)")
+    finally:
+        backend.terminate()
+
+    speedup = throughput[args.replicas] / throughput[1]
+    ideal = min(args.replicas, os.cpu_count() or 1)
+    print(f"speedup {speedup:.2f}x with {args.replicas} replicas (linear up to {ideal}x on this host)")
+    if speedup < ideal * args.min_efficiency:
+        print("FAIL: throughput does not scale with replicas")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
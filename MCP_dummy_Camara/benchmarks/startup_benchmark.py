@@ -0,0 +1,93 @@
+"""
+Cold start benchmark.
+
+Launches `python -m MCP_dummy_Camara.app` on a free port and measures the
+time until the first MCP `initialize` request is answered. Repeats `--runs`
+times and fails if the median exceeds `--budget` seconds (or
+STARTUP_BUDGET_SECONDS), so time-to-first-response regressions break CI.
+
+    python -m MCP_dummy_Camara.benchmarks.startup_benchmark --runs 3 --budget 3
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "startup-benchmark", "version": "1.0"},
+    },
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _initialize(port: int) -> bool:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/mcp",
+        data=json.dumps(INITIALIZE).encode(),
+        headers={"Content-Type": "application/json", "Accept": "application/json, text/event-stream"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=1) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return False
+
+
+def time_to_first_response(timeout: float) -> float:
+    port = _free_port()
+    env = dict(os.environ, MCP_HOST="127.0.0.1", MCP_PORT=str(port), LOG_LEVEL="WARNING")
+    env.setdefault("DUMMY_BACKEND_URL", "http://127.0.0.1:9")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "MCP_dummy_Camara.app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                sys.exit(f"server exited with code {server.returncode} before answering")
+            if _initialize(port):
+                return time.perf_counter() - started
+            time.sleep(0.01)
+        sys.exit(f"server did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0")),
+                        help="maximum median time to first response (s)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    timings = [time_to_first_response(args.timeout) for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"time to first response over {args.runs} runs: median {median:.3f}s, "
+          f"min {min(timings):.3f}s, max {max(timings):.3f}s (budget {args.budget:.2f}s)")
+    if median > args.budget:
+        print("FAIL: cold start regressed beyond the budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the CAMARA backend that answers after a fixed delay."""
+
+    delay = 0.0
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body=None):
+        time.sleep(self.delay)
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        body = self._read_json()
+        if self.path.endswith("/sessions/batch"):
+            self._reply(200, {"results": [
+                {"status": 201, "session": {"sessionId": str(uuid.uuid4()), "qosStatus": "REQUESTED"}}
+                for _ in body.get("sessions", [])
+            ]})
+        elif self.path.endswith("/retrieve-sessions"):
+            self._reply(200, [{"sessionId": str(uuid.uuid4()), "qosProfile": "QOS_L", "qosStatus": "REQUESTED"}])
+        else:
+            self._reply(201, {"sessionId": str(uuid.uuid4()), "qosStatus": "REQUESTED", "qosProfile": body.get("qosProfile")})
+
+    def do_GET(self):
+        if self.path.endswith("/apps"):
+            self._reply(200, [{"appId": "demo-app", "name": "Demo"}])
+        else:
+            self._reply(200, {"sessionId": self.path.rsplit("/", 1)[-1], "qosProfile": "QOS_L", "qosStatus": "AVAILABLE",
+                              "duration": 3600, "device": {}, "applicationServer": {}})
+
+    def do_DELETE(self):
+        self._reply(204)
+
+
+def start_stub_backend(delay: float, port: int = 0) -> ThreadingHTTPServer:
+    """Start the stub backend in a daemon thread; the bound port is `server.server_port`."""
+    handler = type("StubHandler", (_StubHandler,), {"delay": delay})
+    server_class = type("StubServer", (ThreadingHTTPServer,), {"request_queue_size": 512})
+    server = server_class(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,26 @@
+"""
+Pre-generate the MCP schemas of every registered tool.
+
+Run at image build time (see Dockerfile) so the server can advertise its tools
+without generating schemas or importing rarely used tool modules at startup:
+
+    python -m MCP_dummy_Camara.build_tool_schemas
+"""
+import json
+import logging
+
+from MCP_dummy_Camara.app import TOOLS
+from MCP_dummy_Camara.tool_registry import TOOL_SCHEMAS_PATH, build_schemas
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    schemas = build_schemas(TOOLS)
+    with open(TOOL_SCHEMAS_PATH, "w", encoding="utf-8") as f:
+        json.dump(schemas, f, indent=2, sort_keys=True)
+    logger.info("Wrote %d tool schemas to %s", len(schemas["tools"]), TOOL_SCHEMAS_PATH)
+
+
+if __name__ == "__main__":
+    main()
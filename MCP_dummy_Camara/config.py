@@ -0,0 +1,6 @@
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Loaded exactly once per process; every module reads its settings through os.getenv afterwards
+ROOT_DIR = Path(__file__).resolve().parent
+load_dotenv(dotenv_path=ROOT_DIR / ".env")
@@ -0,0 +1,46 @@
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+
+_client: httpx.AsyncClient | None = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Shared pooled async client used by all tools. Normally created by `startup()`;
+    created on first use when the server is embedded without it (e.g. in-memory clients).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def startup() -> None:
+    get_client()
+    logger.info("HTTP client pool ready (max %d connections, %d keep-alive)", HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE)
+
+
+async def shutdown() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("HTTP client pool closed")
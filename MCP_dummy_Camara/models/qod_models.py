@@ -1,7 +1,7 @@
 from ipaddress import IPv6Address
 
-from pydantic import BaseModel, model_validator
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, Dict, Any, List, Literal
 class IPv4Address(BaseModel):
     publicAddress: str
     publicPort: int
@@ -26,6 +26,11 @@ class CreateQoDSessionInput(BaseModel):
     device: DeviceInput
     qosProfile: str
     duration: int
+    idempotencyKey: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="Unique key for this creation; reuse it when retrying so no duplicate session is created",
+    )
 
 # ----- Output schema -----
 class QoDSessionMinimalResponse(BaseModel):
@@ -52,3 +57,35 @@ class QoDSessionFullResponse(BaseModel):
 
 class QoDSessionsList(BaseModel):
     device: DeviceInput
+
+
+# Session fields list_qod_sessions can return inline (what retrieve-sessions provides)
+SessionField = Literal[
+    "sessionId", "qosProfile", "qosStatus", "duration", "startedAt", "expiresAt", "sink", "applicationServer"
+]
+DEFAULT_SESSION_FIELDS = ("sessionId", "qosProfile", "qosStatus", "startedAt", "expiresAt")
+
+
+class BulkCreateQoDSessionsInput(BaseModel):
+    devices: List[DeviceInput] = Field(min_length=1, description="Devices to create one session each for")
+    qosProfile: str
+    duration: int
+
+
+class BulkCreatedSession(BaseModel):
+    index: int
+    sessionId: str
+    qosStatus: str
+
+
+class BulkFailure(BaseModel):
+    error: str
+    indexes: List[int]
+
+
+class BulkQoDSessionsResponse(BaseModel):
+    requested: int
+    succeeded: int
+    failed: int
+    sessions: List[BulkCreatedSession]
+    failures: List[BulkFailure] = Field(default_factory=list, description="Failed devices grouped by error")
@@ -0,0 +1,102 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "json_templates"
+
+# Top-level fields each template must provide, checked once at load time
+REQUIRED_FIELDS = {
+    "qod_request": {
+        "device": dict,
+        "applicationServer": dict,
+        "qosProfile": str,
+        "sink": str,
+        "duration": int,
+    },
+}
+
+
+def freeze(value):
+    """Recursively convert JSON data into read-only mappings and tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload, **kwargs) -> str:
+    """Serialize a payload that may share frozen sub-trees with a template."""
+    return json.dumps(payload, default=_json_default, **kwargs)
+
+
+class TemplateStore:
+    """
+    JSON request templates loaded and validated once, kept immutable in memory.
+
+    Requests build their payloads with a shallow copy-on-write merge on top of
+    the frozen template, so untouched sub-trees are shared and never copied.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._templates = {}
+        self._mtimes = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    def _load(self, name: str):
+        path = self._path(name)
+        if not path.exists():
+            logger.error(f"Template file {path} not found")
+            raise FileNotFoundError(f"{path} not found")
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        for field, expected in REQUIRED_FIELDS.get(name, {}).items():
+            if not isinstance(data.get(field), expected):
+                raise ValueError(f"Template {path.name}: '{field}' must be a {expected.__name__}")
+
+        self._templates[name] = freeze(data)
+        self._mtimes[name] = path.stat().st_mtime_ns
+        logger.info("Loaded template %s", path.name)
+        return self._templates[name]
+
+    def get(self, name: str):
+        template = self._templates.get(name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(name) or self._load(name)
+        return template
+
+    def reload(self, name: str | None = None) -> None:
+        """Re-read one template (or all loaded ones) from disk."""
+        with self._lock:
+            for template_name in [name] if name else list(self._templates):
+                self._load(template_name)
+
+    def reload_if_changed(self) -> None:
+        """Reload templates whose file modification time changed; keeps the old one if the new file is invalid."""
+        with self._lock:
+            for name, mtime in list(self._mtimes.items()):
+                try:
+                    if self._path(name).stat().st_mtime_ns != mtime:
+                        self._load(name)
+                except (OSError, ValueError) as e:
+                    logger.error("Keeping previous %s template: %s", name, e)
+
+
+templates = TemplateStore(TEMPLATE_DIR)
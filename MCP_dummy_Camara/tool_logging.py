@@ -0,0 +1,95 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+DEFAULT_SAMPLE_RATE = float(os.getenv("TOOL_LOG_SAMPLE_RATE", "1.0"))
+MAX_PAYLOAD_CHARS = int(os.getenv("TOOL_LOG_MAX_PAYLOAD_CHARS", "2000"))
+
+
+def _parse_rates(raw: str | None) -> dict:
+    """Parse TOOL_LOG_SAMPLE_RATES, e.g. "get_qod_session=0.1,create_qod_session=1"."""
+    rates = {}
+    for item in (raw or "").split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        try:
+            rates[name.strip()] = float(value)
+        except ValueError:
+            logger.warning("Ignoring invalid log sample rate %r", item)
+    return rates
+
+
+SAMPLE_RATES = _parse_rates(os.getenv("TOOL_LOG_SAMPLE_RATES"))
+
+
+class LazyJSON:
+    """Defers serializing a payload until a handler actually formats the record."""
+
+    __slots__ = ("payload", "max_chars")
+
+    def __init__(self, payload, max_chars: int = MAX_PAYLOAD_CHARS):
+        self.payload = payload
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        if isinstance(self.payload, (str, bytes)):
+            text = self.payload.decode("utf-8", "replace") if isinstance(self.payload, bytes) else self.payload
+        else:
+            text = json.dumps(self.payload, default=str, separators=(",", ":"))
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}...(truncated, {len(text)} chars)"
+        return text
+
+
+class PayloadLogger:
+    """
+    Logs request/response payloads of one tool at DEBUG level, sampled by the
+    tool's rate and size-capped. Nothing is serialized for records that are dropped.
+    """
+
+    def __init__(self, logger: logging.Logger, tool: str):
+        self.logger = logger
+        self.tool = tool
+        self.rate = SAMPLE_RATES.get(tool, DEFAULT_SAMPLE_RATE)
+
+    def debug(self, event: str, payload) -> None:
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        if self.rate < 1.0 and random.random() >= self.rate:
+            return
+        self.logger.debug("tool=%s event=%s payload=%s", self.tool, event, LazyJSON(payload))
+
+
+_listener = None
+
+
+def configure_logging(level: str | None = None) -> None:
+    """
+    Route all logging through a queue drained by a background thread. Safe to call repeatedly.
+
+    Records are formatted before they are queued (QueueHandler.prepare), since
+    their arguments may be payload dicts that the tool goes on to mutate; only
+    the stream write happens on the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO"))
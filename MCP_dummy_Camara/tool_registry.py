@@ -0,0 +1,129 @@
+import hashlib
+import importlib
+import json
+import logging
+import os
+from typing import NamedTuple
+
+from fastmcp.tools.tool import FunctionTool, Tool, ToolResult
+from pydantic import PrivateAttr
+
+from MCP_dummy_Camara.config import ROOT_DIR
+
+logger = logging.getLogger(__name__)
+
+# Written at image build time by `python -m MCP_dummy_Camara.build_tool_schemas`
+TOOL_SCHEMAS_PATH = os.getenv("TOOL_SCHEMAS_PATH", str(ROOT_DIR / "tool_schemas.json"))
+
+# Tool signatures depend on these sources; any edit invalidates the cached schemas
+SCHEMA_SOURCE_DIRS = ("tools", "models")
+
+
+class ToolSpec(NamedTuple):
+    """A tool function referenced by module path, so its module can be imported lazily."""
+
+    module: str
+    function: str
+    lazy: bool = False
+
+
+def source_digest() -> str:
+    """Hash of every tool and model source file, stored alongside the generated schemas."""
+    digest = hashlib.sha256()
+    for directory in SCHEMA_SOURCE_DIRS:
+        for path in sorted((ROOT_DIR / directory).rglob("*.py")):
+            digest.update(path.relative_to(ROOT_DIR).as_posix().encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _load_function(spec: ToolSpec):
+    return getattr(importlib.import_module(spec.module), spec.function)
+
+
+def build_schemas(specs) -> dict:
+    """Generate the MCP schema of every tool, as FastMCP would at registration."""
+    tools = {}
+    for spec in specs:
+        tool = FunctionTool.from_function(_load_function(spec))
+        tools[tool.name] = {
+            "module": spec.module,
+            "function": spec.function,
+            "description": tool.description,
+            "parameters": tool.parameters,
+            "output_schema": tool.output_schema,
+        }
+    return {"source_digest": source_digest(), "tools": tools}
+
+
+def load_schemas(path: str = TOOL_SCHEMAS_PATH) -> dict:
+    """Return cached schemas by tool name, or {} when the file is missing or stale."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        logger.info("No usable tool schema cache at %s, generating schemas at startup", path)
+        return {}
+    if cached.get("source_digest") != source_digest():
+        logger.warning("Tool schema cache %s is stale, generating schemas at startup", path)
+        return {}
+    return cached.get("tools", {})
+
+
+def _cached_tool(fn, name: str, schema: dict) -> FunctionTool:
+    # FunctionTool only needs the schemas for listing; validation uses `fn` itself
+    return FunctionTool(
+        fn=fn,
+        name=name,
+        description=schema["description"],
+        parameters=schema["parameters"],
+        output_schema=schema["output_schema"],
+    )
+
+
+class LazyTool(Tool):
+    """
+    Tool advertised from its cached schema; the module implementing it is
+    imported on the first call instead of at server start.
+    """
+
+    module: str
+    function: str
+    _delegate: FunctionTool | None = PrivateAttr(default=None)
+
+    async def run(self, arguments: dict) -> ToolResult:
+        if self._delegate is None:
+            logger.info("Loading tool module %s on first call to %s", self.module, self.name)
+            fn = getattr(importlib.import_module(self.module), self.function)
+            self._delegate = _cached_tool(fn, self.name, {
+                "description": self.description,
+                "parameters": self.parameters,
+                "output_schema": self.output_schema,
+            })
+        return await self._delegate.run(arguments)
+
+
+def register_tools(app, specs) -> None:
+    """
+    Register `specs` on `app` using the build-time schema cache when it is fresh.
+
+    Lazy specs are only imported on first use; without a cache every tool is
+    imported and its schema generated at startup, as `app.tool()` does.
+    """
+    schemas = {schema["function"]: (name, schema) for name, schema in load_schemas().items()}
+    for spec in specs:
+        cached = schemas.get(spec.function)
+        if cached is None or cached[1]["module"] != spec.module:
+            app.tool()(_load_function(spec))
+        elif spec.lazy:
+            name, schema = cached
+            app.add_tool(LazyTool(
+                name=name,
+                description=schema["description"],
+                parameters=schema["parameters"],
+                output_schema=schema["output_schema"],
+                module=spec.module,
+                function=spec.function,
+            ))
+        else:
+            app.add_tool(_cached_tool(_load_function(spec), *cached))
@@ -1,33 +1,104 @@
+import asyncio
 import logging
-import requests
-from dotenv import load_dotenv
-from pathlib import Path
+import time
 import os
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
+import MCP_dummy_Camara.config  # noqa: F401  loads .env once
+from MCP_dummy_Camara.metrics import tool_metrics
+from MCP_dummy_Camara.http_client import get_client
 logger = logging.getLogger("MCP server")
 
-# Calculate the path to the root .env file
-root_dir = Path(__file__).resolve().parent.parent  # go up one level from tools/
-env_path = root_dir / ".env"
-
-# Load the .env file
-load_dotenv(dotenv_path=env_path)
 SESSION_SERVICE_URL = os.getenv("ISI_URL")
 
+
+# App definitions change rarely: serve them from memory for EDGE_APPS_TTL seconds,
+# then serve the stale copy for up to EDGE_APPS_STALE_SECONDS while revalidating.
+EDGE_APPS_TTL = float(os.getenv("EDGE_APPS_TTL", "300"))
+EDGE_APPS_STALE_SECONDS = float(os.getenv("EDGE_APPS_STALE_SECONDS", "600"))
+EDGE_APPS_MAX_BYTES = int(os.getenv("EDGE_APPS_MAX_BYTES", str(5 * 1024 * 1024)))
+
+
+class AppDefinitionsCache:
+    """
+    Single-entry cache of the provider's application definitions with
+    conditional revalidation (ETag / Last-Modified) and stale-while-revalidate.
+    Responses larger than `max_bytes` are returned but not kept.
+    """
+
+    def __init__(self, ttl: float, stale_seconds: float, max_bytes: int):
+        self.ttl = ttl
+        self.stale_seconds = stale_seconds
+        self.max_bytes = max_bytes
+        self.data = None
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "not_modified": 0}
+
+    async def _fetch(self) -> dict:
+        url = f"{SESSION_SERVICE_URL}/apps"
+        headers = {"accept": "application/json"}
+        if self.data is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        with tool_metrics.upstream():
+            response = await get_client().get(url, headers=headers, follow_redirects=True)
+            if response.status_code == 304 and self.data is not None:
+                self.stats["not_modified"] += 1
+                self.fetched_at = time.monotonic()
+                return self.data
+            response.raise_for_status()
+        data = response.json()
+
+        # Ensure the result is a dict for FastMCP compatibility
+        if isinstance(data, list):
+            data = {"applications": data}
+
+        if len(response.content) <= self.max_bytes:
+            self.data = data
+            self.etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
+            self.fetched_at = time.monotonic()
+        else:
+            logger.warning("App definitions (%d bytes) exceed cache bound, not cached", len(response.content))
+        return data
+
+    async def _revalidate(self) -> None:
+        try:
+            async with self._lock:
+                await self._fetch()
+        except Exception as e:
+            logger.warning("Background refresh of app definitions failed: %s", e)
+
+    async def get(self) -> dict:
+        age = time.monotonic() - self.fetched_at
+        if self.data is not None and age < self.ttl:
+            self.stats["hits"] += 1
+            return self.data
+        if self.data is not None and age < self.ttl + self.stale_seconds:
+            self.stats["stale_hits"] += 1
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._revalidate())
+            return self.data
+
+        self.stats["misses"] += 1
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.data is not None and time.monotonic() - self.fetched_at < self.ttl:
+                return self.data
+            return await self._fetch()
+
+
+app_definitions_cache = AppDefinitionsCache(EDGE_APPS_TTL, EDGE_APPS_STALE_SECONDS, EDGE_APPS_MAX_BYTES)
+
+
 async def get_app_definitions() -> dict:
     """
     Get the list of all existing Application definitions from the Edge Cloud Provider
     that the user has permission to view.
     """
-    url = f"{SESSION_SERVICE_URL}/apps"
-    headers = {"accept": "application/json"}
-
-    response = requests.get(url, headers=headers, allow_redirects=True)
-    response.raise_for_status()
-    data = response.json()
-
-    # Ensure the result is a dict for FastMCP compatibility
-    if isinstance(data, list):
-        return {"applications": data}
-    return data
\ No newline at end of file
+    return await app_definitions_cache.get()
@@ -1,26 +1,21 @@
 import os
-import json
 import logging
-import requests
-from pathlib import Path
-from dotenv import load_dotenv
+import httpx
 from MCP_dummy_Camara.models.location_verfication_models import VerifyRequest, VerifyResponse
-import json
+import MCP_dummy_Camara.config  # noqa: F401  loads .env once
+from MCP_dummy_Camara.metrics import tool_metrics
+from MCP_dummy_Camara.http_client import get_client
+from MCP_dummy_Camara.tool_logging import PayloadLogger
 
 logger = logging.getLogger(__name__)
+verify_log = PayloadLogger(logger, "verify_device_location")
 
-# Calculate the path to the root .env file
-root_dir = Path(__file__).resolve().parent.parent  # go up one level from tools/
-env_path = root_dir / ".env"
-
-# Load the .env file
-load_dotenv(dotenv_path=env_path)
 SESSION_SERVICE_URL = os.getenv("DUMMY_BACKEND_URL")
 
 
-def verify_device_location(inp: VerifyRequest) -> VerifyResponse:
+async def verify_device_location(inp: VerifyRequest) -> VerifyResponse:
     """
-    Verify device location by sending a request to the external verification endpoint using requests.
+    Verify device location by sending a request to the external verification endpoint.
     """
     payload = {
         "device": {
@@ -40,14 +35,15 @@ def verify_device_location(inp: VerifyRequest) -> VerifyResponse:
     url = f"{SESSION_SERVICE_URL}/verify"
 
     try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
+        with tool_metrics.upstream():
+            response = await get_client().post(url, json=payload)
+            response.raise_for_status()
         resp_json = response.json()
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error("Failed to send request to verification service: %s", e)
         raise
 
-    logger.debug("Raw response: %s", json.dumps(resp_json, indent=2))
+    verify_log.debug("response", resp_json)
 
     return VerifyResponse(
         verificationResult=resp_json.get("verificationResult", "FALSE"),
@@ -1,61 +1,86 @@
-import json
+import asyncio
 import logging
-import requests
-from pathlib import Path
+import httpx
 from MCP_dummy_Camara.models.qod_models import *
+import MCP_dummy_Camara.config  # noqa: F401  loads .env once
+from MCP_dummy_Camara.metrics import tool_metrics
+from MCP_dummy_Camara.http_client import get_client
+from MCP_dummy_Camara.templates import templates, dumps
+from MCP_dummy_Camara.tool_logging import PayloadLogger
 import os
-from dotenv import load_dotenv
-from typing import List
+from typing import List, Optional
 
-##
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("MCP server")
 
-# Calculate the path to the root .env file
-root_dir = Path(__file__).resolve().parent.parent  # go up one level from tools/
-env_path = root_dir / ".env"
-
-# Load the .env file
-load_dotenv(dotenv_path=env_path)
+# Sampled, size-capped payload logging per tool (serialized only when emitted)
+create_log = PayloadLogger(logger, "create_qod_session")
+get_log = PayloadLogger(logger, "get_qod_session")
+list_log = PayloadLogger(logger, "list_qod_sessions")
 
 SESSION_SERVICE_URL = os.getenv("DUMMY_BACKEND_URL")
 if not SESSION_SERVICE_URL:
     raise EnvironmentError("SESSION_SERVICE_URL environment variable is not set")
 
+# Upper bound on sessions returned by list_qod_sessions
+LIST_SESSIONS_MAX = int(os.getenv("LIST_SESSIONS_MAX", "100"))
+
+# Bulk provisioning: devices per call, backend calls in flight when creating
+# one by one, and the backend endpoint that creates many sessions per request
+BULK_MAX_DEVICES = int(os.getenv("BULK_MAX_DEVICES", "100"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "100"))
+QOD_BATCH_PATH = os.getenv("QOD_BATCH_PATH", "/sessions/batch")
+
+# Cleared the first time the backend turns out not to have the batch endpoint
+_batch_supported = bool(QOD_BATCH_PATH)
+
+# Load and validate the request template once at startup
+QOD_REQUEST_TEMPLATE = "qod_request"
+templates.get(QOD_REQUEST_TEMPLATE)
+
+
+def _session_payload(device: DeviceInput, qos_profile: str, duration: int) -> dict:
+    template = templates.get(QOD_REQUEST_TEMPLATE)
+
+    # Copy-on-write merge: only the top level and the device get new dicts,
+    # every other sub-tree is shared with the frozen template
+    device_data = device.model_dump(mode="json", exclude_unset=True)
+    return {
+        **template,
+        "device": {**template["device"], **device_data},
+        "qosProfile": qos_profile,
+        "duration": duration,
+    }
+
+
 async def create_qod_session(inp: CreateQoDSessionInput) -> QoDSessionMinimalResponse:
     """
     Create QoS session
     """
 
-    # Load JSON template
-    BASE_DIR = Path(__file__).parent.parent  # Directory of the parent of the current directory
-    json_path = BASE_DIR / "json_templates" / "qod_request.json"
+    body = dumps(_session_payload(inp.device, inp.qosProfile, inp.duration))
 
-    if not json_path.exists():
-        logger.error(f"Template file {json_path} not found")
-        raise FileNotFoundError(f"{json_path} not found")
+    headers = {"Content-Type": "application/json"}
+    if inp.idempotencyKey:
+        # The backend replays the original response for a repeated key
+        headers["Idempotency-Key"] = inp.idempotencyKey
 
-    with open(json_path, "r", encoding="utf-8") as f:
-        template = json.load(f)
-
-    # Merge inputs into the template
-    device_data = inp.device.model_dump(exclude_unset=True)
-    template["device"].update(device_data)
-    template["qosProfile"] = inp.qosProfile
-    template["duration"] = inp.duration
-
-    logger.debug("Final request payload: %s", json.dumps(template, indent=2))
+    create_log.debug("request", body)
 
     try:
-        response = requests.post(f"{SESSION_SERVICE_URL}/sessions", json=template, proxies=None)
-        response.raise_for_status()
-    except requests.RequestException as e:
+        with tool_metrics.upstream():
+            response = await get_client().post(
+                f"{SESSION_SERVICE_URL}/sessions",
+                content=body,
+                headers=headers,
+            )
+            response.raise_for_status()
+    except httpx.HTTPError as e:
         logger.error("Failed to send request to session service: %s", e)
         raise
 
     resp_json = response.json()
-    logger.debug("Raw response: %s", json.dumps(resp_json, indent=2))
+    create_log.debug("response", resp_json)
 
     # Extract only needed fields
     return QoDSessionMinimalResponse(
@@ -64,6 +89,107 @@ async def create_qod_session(inp: CreateQoDSessionInput) -> QoDSessionMinimalRes
     )
 
 
+def _error_text(e: httpx.HTTPError) -> str:
+    if isinstance(e, httpx.HTTPStatusError):
+        try:
+            message = e.response.json().get("message")
+        except ValueError:
+            message = None
+        return f"HTTP {e.response.status_code}: {message or e.response.reason_phrase}"
+    return f"{type(e).__name__}: {e}"
+
+
+async def _create_individually(payloads: list) -> list:
+    """POST each session on its own, at most BULK_CONCURRENCY at a time."""
+    semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def create(index: int, payload: dict):
+        async with semaphore:
+            try:
+                with tool_metrics.upstream():
+                    response = await get_client().post(
+                        f"{SESSION_SERVICE_URL}/sessions",
+                        content=dumps(payload),
+                        headers={"Content-Type": "application/json"},
+                    )
+                    response.raise_for_status()
+                return index, response.json(), None
+            except httpx.HTTPError as e:
+                return index, None, _error_text(e)
+
+    return await asyncio.gather(*(create(i, payload) for i, payload in enumerate(payloads)))
+
+
+async def _create_batched(payloads: list) -> list | None:
+    """Create sessions through the backend batch endpoint; None if the backend has none."""
+    global _batch_supported
+    results = []
+    for start in range(0, len(payloads), BULK_BATCH_SIZE):
+        chunk = payloads[start:start + BULK_BATCH_SIZE]
+        try:
+            with tool_metrics.upstream():
+                response = await get_client().post(
+                    f"{SESSION_SERVICE_URL}{QOD_BATCH_PATH}",
+                    content=dumps({"sessions": chunk}),
+                    headers={"Content-Type": "application/json"},
+                )
+            if start == 0 and response.status_code in (404, 405):
+                logger.info("Backend has no %s endpoint, creating sessions one by one", QOD_BATCH_PATH)
+                _batch_supported = False
+                return None
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            error = _error_text(e)
+            results += [(start + offset, None, error) for offset in range(len(chunk))]
+            continue
+
+        items = response.json().get("results", [])
+        for offset in range(len(chunk)):
+            item = items[offset] if offset < len(items) else {"status": 502, "error": {"message": "missing result"}}
+            if item.get("status") == 201:
+                results.append((start + offset, item.get("session", {}), None))
+            else:
+                message = (item.get("error") or {}).get("message", "creation failed")
+                results.append((start + offset, None, f"HTTP {item.get('status')}: {message}"))
+    return results
+
+
+async def create_qod_sessions_bulk(inp: BulkCreateQoDSessionsInput) -> BulkQoDSessionsResponse:
+    """
+    Create one QoS session per device, all with the same profile and duration.
+    Returns the created sessions by device index and the failed device indexes grouped by error,
+    so a partial failure can be retried for just those devices.
+    """
+    if len(inp.devices) > BULK_MAX_DEVICES:
+        raise ValueError(f"At most {BULK_MAX_DEVICES} devices per call, got {len(inp.devices)}")
+
+    payloads = [_session_payload(device, inp.qosProfile, inp.duration) for device in inp.devices]
+    create_log.debug("bulk_request", {"devices": len(payloads), "qosProfile": inp.qosProfile})
+
+    results = await _create_batched(payloads) if _batch_supported else None
+    if results is None:
+        results = await _create_individually(payloads)
+
+    sessions, failures = [], {}
+    for index, session, error in sorted(results, key=lambda result: result[0]):
+        if error is None:
+            sessions.append(BulkCreatedSession(
+                index=index, sessionId=session.get("sessionId"), qosStatus=session.get("qosStatus")
+            ))
+        else:
+            failures.setdefault(error, []).append(index)
+
+    if failures:
+        logger.warning("Bulk QoD provisioning: %d of %d sessions failed", len(payloads) - len(sessions), len(payloads))
+    return BulkQoDSessionsResponse(
+        requested=len(payloads),
+        succeeded=len(sessions),
+        failed=len(payloads) - len(sessions),
+        sessions=sessions,
+        failures=[BulkFailure(error=error, indexes=indexes) for error, indexes in failures.items()],
+    )
+
+
 async def get_qod_session(inp: GetQoDSessionInput) -> QoDSessionFullResponse:
     """
     Retrieves QoS session information based on session id
@@ -73,14 +199,15 @@ async def get_qod_session(inp: GetQoDSessionInput) -> QoDSessionFullResponse:
     logger.debug("Fetching session details from: %s", session_url)
 
     try:
-        response = requests.get(session_url, proxies=None)
-        response.raise_for_status()
-    except requests.RequestException as e:
+        with tool_metrics.upstream():
+            response = await get_client().get(session_url)
+            response.raise_for_status()
+    except httpx.HTTPError as e:
         logger.error("Failed to get session %s: %s", inp.sessionId, e)
         raise
 
     resp_json = response.json()
-    logger.debug("Session details response: %s", json.dumps(resp_json, indent=2))
+    get_log.debug("response", resp_json)
 
     # Return all session details
     return QoDSessionFullResponse(
@@ -106,7 +233,8 @@ async def delete_qod_session(inp: GetQoDSessionInput) -> str:
     logger.debug("Deleting session at: %s", session_url)
 
     try:
-        response = requests.delete(session_url, proxies=None)
+        with tool_metrics.upstream():
+            response = await get_client().delete(session_url)
         if response.status_code == 204:
             logger.info("Session %s deleted successfully", inp.sessionId)
             return "success"
@@ -118,35 +246,49 @@ async def delete_qod_session(inp: GetQoDSessionInput) -> str:
                 response.text
             )
             response.raise_for_status()
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error("Failed to delete session %s: %s", inp.sessionId, e)
 
 
 
-async def list_qod_sessions(inp: DeviceInput) -> list[str]:
+async def list_qod_sessions(
+    inp: DeviceInput,
+    expand: bool = False,
+    fields: Optional[List[SessionField]] = None,
+    limit: int = 50,
+) -> list[str] | list[dict]:
     """
-    Retrieves all QoS session IDs based on user's device input
+    Retrieves QoS sessions based on user's device input.
+    Returns every session ID by default; with expand=True (or fields) returns the
+    selected fields of at most `limit` sessions, so no follow-up get_qod_session
+    call per session is needed.
     """
 
     sessions_url = f"{SESSION_SERVICE_URL}/retrieve-sessions"
-    payload = {"device": inp.model_dump(exclude_unset=True)}
+    payload = {"device": inp.model_dump(mode="json", exclude_unset=True)}
 
     if not payload["device"]:
         raise ValueError("Device input must include at least one identifier")
 
-    logger.debug("Fetching QoS sessions with payload: %s", json.dumps(payload, indent=2))
+    limit = max(1, min(limit, LIST_SESSIONS_MAX))
+    list_log.debug("request", payload)
 
     try:
-        response = requests.post(sessions_url, json=payload)
-        response.raise_for_status()
-    except requests.RequestException as e:
+        with tool_metrics.upstream():
+            response = await get_client().post(sessions_url, json=payload)
+            response.raise_for_status()
+    except httpx.HTTPError as e:
         logger.error("Failed to retrieve QoS sessions: %s", e)
         raise
 
     resp_json = response.json()
-    logger.debug("List of sessions response: %s", json.dumps(resp_json, indent=2))
+    list_log.debug("response", resp_json)
+
+    sessions = [session for session in resp_json if "sessionId" in session]
 
-    # Return only the sessionId strings
-    session_ids = [session.get("sessionId") for session in resp_json if "sessionId" in session]
+    if not (expand or fields):
+        # Return only the sessionId strings, uncapped as before `limit` existed
+        return [session.get("sessionId") for session in sessions]
 
-    return session_ids
+    selected = fields or DEFAULT_SESSION_FIELDS
+    return [{field: session.get(field) for field in selected} for session in sessions[:limit]]
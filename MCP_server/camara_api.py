@@ -1,7 +1,9 @@
 import logging
 import os
-import requests
 from dotenv import load_dotenv
+from metrics import tool_metrics
+from resilience import CircuitOpenError, ResilientClient, load_policies
+from singleflight import SAFE_METHODS, SingleFlight
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +17,19 @@ logger = logging.getLogger("camara-http-client")
 
 BASE_URL = os.getenv("CAMARA_API_BASE_URL", "http://localhost:5020")
 
+# Per-endpoint timeouts, retries, hedging and circuit breaker settings
+client = ResilientClient(BASE_URL, load_policies(os.getenv("CAMARA_RESILIENCE_CONFIG")))
+
+# Concurrent identical reads share one upstream request
+singleflight = SingleFlight()
+
+
+def _request_json(endpoint: str, method: str, params, data):
+    with tool_metrics.upstream():
+        resp = client.request(endpoint, method=method, params=params, data=data)
+        resp.raise_for_status()
+    return resp.json()
+
 
 def camara_api_call(endpoint: str, method="GET", params=None, data=None):
     """
@@ -22,16 +37,17 @@ def camara_api_call(endpoint: str, method="GET", params=None, data=None):
     """
     url = f"{BASE_URL}{endpoint}"
     try:
-        if method == "GET":
-            resp = requests.get(url, params=params, timeout=5)
-        elif method == "POST":
-            resp = requests.post(url, json=data, timeout=5)
-        elif method == "DELETE":
-            resp = requests.delete(url, timeout=5)
-        else:
+        if method not in ("GET", "POST", "DELETE"):
             raise ValueError(f"Unsupported method {method}")
-        resp.raise_for_status()
-        return resp.json()
+        if method in SAFE_METHODS:
+            return singleflight.do(
+                SingleFlight.key(method, endpoint, params),
+                lambda: _request_json(endpoint, method, params, data),
+            )
+        return _request_json(endpoint, method, params, data)
+    except CircuitOpenError as e:
+        logger.warning("Fast-failing %s: %s", url, e)
+        return {"status": "error", "message": str(e)}
     except Exception as e:
         logger.error("Error calling %s: %s", url, e, exc_info=True)
         return {"status": "error", "message": str(e)}
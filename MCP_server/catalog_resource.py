@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import weakref
+
+from pydantic import AnyUrl
+
+from camara_api import camara_api_call
+
+logger = logging.getLogger("camara-catalog-resource")
+
+CATALOG_URI = "resource://service_catalog"
+
+
+class CatalogPublisher:
+    """
+    Holds the service catalog loaded once from the backend and notifies
+    subscribed MCP sessions when the backend catalog's content hash changes.
+    """
+
+    def __init__(self, uri: str, poll_seconds: float):
+        self.uri = uri
+        self.poll_seconds = poll_seconds
+        self._catalog = None
+        self._hash = None
+        self._load_lock = threading.Lock()
+        self._subscribers = weakref.WeakSet()
+        self._poller = None
+
+    @staticmethod
+    def _digest(catalog) -> str:
+        return hashlib.sha256(json.dumps(catalog, sort_keys=True).encode()).hexdigest()
+
+    def _fetch(self) -> bool:
+        """Fetch the catalog; returns True when its content changed."""
+        catalog = camara_api_call("/catalog")
+        if isinstance(catalog, dict) and catalog.get("status") == "error":
+            logger.warning("Catalog refresh failed: %s", catalog.get("message"))
+            return False
+        digest = self._digest(catalog)
+        if digest == self._hash:
+            return False
+        self._catalog, self._hash = catalog, digest
+        logger.info("Service catalog loaded (sha256 %s)", digest[:12])
+        return True
+
+    def read(self) -> str:
+        with self._load_lock:
+            if self._catalog is None:
+                self._fetch()
+        if self._catalog is None:
+            raise RuntimeError("Service catalog is not available")
+        return json.dumps(self._catalog)
+
+    def subscribe(self, session) -> None:
+        self._subscribers.add(session)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+
+    def unsubscribe(self, session) -> None:
+        self._subscribers.discard(session)
+
+    async def _poll(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.poll_seconds)
+            if await asyncio.to_thread(self._fetch):
+                await self._notify()
+        logger.debug("No catalog subscribers left, stopping poller")
+
+    async def _notify(self) -> None:
+        uri = AnyUrl(self.uri)
+        for session in list(self._subscribers):
+            try:
+                await session.send_resource_updated(uri)
+            except Exception as e:
+                logger.debug("Dropping catalog subscriber: %s", e)
+                self._subscribers.discard(session)
+
+
+def enable_resource_subscriptions(server) -> None:
+    """Advertise `resources.subscribe` in the capabilities of a low-level MCP server."""
+    get_capabilities = server.get_capabilities
+
+    def with_subscribe(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+    server.get_capabilities = with_subscribe
@@ -1,8 +1,16 @@
+import asyncio
+import functools
 import logging
 import os
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
-from camara_api import camara_api_call
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from camara_api import camara_api_call, client, singleflight
+from catalog_resource import CATALOG_URI, CatalogPublisher, enable_resource_subscriptions
+from metrics import tool_metrics
+from session_store import create_event_store
+from tool_cache import tool_cache
 
 # Load environment variables
 load_dotenv()
@@ -16,58 +24,184 @@ logger = logging.getLogger("camara-mcp-server")
 
 MCP_SERVER_NAME = os.getenv("MCP_SERVER_NAME", "camara-mcp-server")
 MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "streamable-http")
-
-mcp = FastMCP(MCP_SERVER_NAME)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_MAX_DEVICES = int(os.getenv("BATCH_MAX_DEVICES", "100"))
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "60"))
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "8000"))
+
+# Stateless mode serves every request on a fresh transport, so replicas behind a
+# load balancer need no session affinity; otherwise MCP_EVENT_STORE makes streams resumable.
+MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "false").lower() in ("1", "true", "yes")
+MCP_EVENT_STORE = os.getenv("MCP_EVENT_STORE", "")
+MCP_EVENT_TTL = float(os.getenv("MCP_EVENT_TTL", "3600"))
+if MCP_STATELESS_HTTP and MCP_EVENT_STORE:
+    logger.warning("MCP_EVENT_STORE is ignored in stateless mode")
+
+mcp = FastMCP(
+    MCP_SERVER_NAME,
+    host=MCP_HOST,
+    port=MCP_PORT,
+    stateless_http=MCP_STATELESS_HTTP,
+    event_store=None if MCP_STATELESS_HTTP else create_event_store(MCP_EVENT_STORE, ttl=MCP_EVENT_TTL),
+)
+tool_metrics.instrument_server(mcp._mcp_server)
 
 # Service catalog resource
-# @mcp.resource("resource://service_catalog")
-# def service_catalog():
-#     """Available CAMARA services and their metadata."""
-#     return camara_api_call("/catalog")
+catalog_publisher = CatalogPublisher(CATALOG_URI, poll_seconds=CATALOG_POLL_SECONDS)
+enable_resource_subscriptions(mcp._mcp_server)
+
+
+@mcp.resource(CATALOG_URI, mime_type="application/json")
+def service_catalog() -> str:
+    """Available CAMARA services and their metadata."""
+    return catalog_publisher.read()
+
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri) -> None:
+    if str(uri) == CATALOG_URI:
+        catalog_publisher.subscribe(mcp.get_context().session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri) -> None:
+    if str(uri) == CATALOG_URI:
+        catalog_publisher.unsubscribe(mcp.get_context().session)
+
+
+def off_loop(fn):
+    """
+    Run a blocking tool in a worker thread, so a slow backend call (timeouts,
+    retry backoff, hedging) only holds up its own session.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        # to_thread copies the context, so upstream time is still attributed to the tool
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return wrapper
 
 
 # Tools
 @mcp.tool()
+@off_loop
+@tool_cache.cached
 def get_catalog():
     return camara_api_call("/catalog")
 
 
 @mcp.tool()
+@off_loop
+@tool_cache.cached
 def get_device_location(deviceId: str):
     return camara_api_call("/apis/device-location/v1/location", params={"deviceId": deviceId})
 
 
 @mcp.tool()
+@off_loop
 def create_qod_session(phoneNumber: str, qosProfile: str = "QCI_1_voice"):
     payload = {"phoneNumber": phoneNumber, "qosProfile": qosProfile}
-    return camara_api_call("/apis/quality-on-demand/v1/sessions", method="POST", data=payload)
+    result = camara_api_call("/apis/quality-on-demand/v1/sessions", method="POST", data=payload)
+    # A lookup cached before the create (e.g. of the new session id) is stale now
+    tool_cache.invalidate("get_qod_session")
+    return result
 
 
 @mcp.tool()
+@off_loop
+@tool_cache.cached
 def get_qod_session(sessionId: str):
     return camara_api_call(f"/apis/quality-on-demand/v1/sessions/{sessionId}")
 
 
 @mcp.tool()
+@off_loop
 def delete_qod_session(sessionId: str):
-    return camara_api_call(f"/apis/quality-on-demand/v1/sessions/{sessionId}", method="DELETE")
+    result = camara_api_call(f"/apis/quality-on-demand/v1/sessions/{sessionId}", method="DELETE")
+    tool_cache.invalidate("get_qod_session", sessionId=sessionId)
+    return result
 
 
 @mcp.tool()
+@off_loop
 def send_sms(to: str, content: str):
     return camara_api_call("/apis/sms-messaging/v1/send", method="POST", data={"to": to, "content": content})
 
 
 @mcp.tool()
+@off_loop
+@tool_cache.cached
 def check_reachability(deviceId: str):
     return camara_api_call("/apis/device-reachability/v1/check", params={"deviceId": deviceId})
 
 
 @mcp.tool()
+@off_loop
+@tool_cache.cached
 def verify_number(phoneNumber: str):
     return camara_api_call("/apis/number-verification/v1/verify", params={"phoneNumber": phoneNumber})
 
 
+# Batch tools
+async def _fan_out(tool, deviceIds: list[str]) -> dict:
+    """Run a per-device tool for many devices concurrently and merge the results."""
+    unique_ids = list(dict.fromkeys(deviceIds))
+    if len(unique_ids) > BATCH_MAX_DEVICES:
+        return {"status": "error", "message": f"At most {BATCH_MAX_DEVICES} devices per call"}
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(device_id):
+        async with semaphore:
+            return device_id, await tool(device_id)
+
+    results, errors = {}, {}
+    for device_id, result in await asyncio.gather(*(run(d) for d in unique_ids)):
+        if isinstance(result, dict) and result.get("status") == "error":
+            errors[device_id] = result.get("message")
+        elif isinstance(result, dict):
+            results[device_id] = {k: v for k, v in result.items() if k != "deviceId"}
+        else:
+            results[device_id] = result
+    return {"count": len(unique_ids), "results": results, "errors": errors}
+
+
+@mcp.tool()
+async def get_device_location_batch(deviceIds: list[str]):
+    """Get the location of several devices in one call."""
+    return await _fan_out(get_device_location, deviceIds)
+
+
+@mcp.tool()
+async def check_reachability_batch(deviceIds: list[str]):
+    """Check whether several devices are reachable in one call."""
+    return await _fan_out(check_reachability, deviceIds)
+
+
+# Prometheus metrics: per-tool latency histograms, error counts and upstream HTTP time
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(tool_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# Cache statistics
+@mcp.custom_route("/cache/stats", methods=["GET"])
+async def cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(tool_cache.stats())
+
+
+# Circuit breaker, retry and hedging statistics
+@mcp.custom_route("/resilience/stats", methods=["GET"])
+async def resilience_stats(request: Request) -> JSONResponse:
+    return JSONResponse(client.stats())
+
+
+# Request coalescing statistics
+@mcp.custom_route("/coalescing/stats", methods=["GET"])
+async def coalescing_stats(request: Request) -> JSONResponse:
+    return JSONResponse(singleflight.stats())
+
+
 if __name__ == "__main__":
     logger.info(f"Starting MCP server '{MCP_SERVER_NAME}' with transport '{MCP_TRANSPORT}'")
     try:
@@ -0,0 +1,147 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from mcp import types
+
+# Tool currently being executed, used to attribute upstream HTTP time
+current_tool = contextvars.ContextVar("current_tool", default="-")
+
+# Exported `le` bounds in seconds; recording uses finer log-linear buckets
+EXPORT_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SUB_BUCKET_BITS = 3  # 8 linear sub-buckets per power of two: <= 12.5% relative error
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations recorded in microseconds.
+
+    Values are bucketed by power of two and then linearly within it, so
+    recording is a couple of integer operations and memory stays constant.
+    """
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.sum = 0.0
+
+    @staticmethod
+    def _index(micros: int) -> int:
+        if micros < (1 << SUB_BUCKET_BITS):
+            return micros
+        shift = micros.bit_length() - 1 - SUB_BUCKET_BITS
+        return ((shift + 1) << SUB_BUCKET_BITS) + (micros >> shift) - (1 << SUB_BUCKET_BITS)
+
+    def record(self, seconds: float) -> None:
+        self.counts[self._index(int(seconds * 1e6))] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self, bounds=EXPORT_BOUNDS) -> list:
+        """
+        (bound, count) pairs for Prometheus `le` buckets. The bucket holding a
+        bound counts toward it, so no value <= bound is missed; a count may
+        include values up to one sub-bucket above the bound.
+        """
+        buckets = sorted(self.counts.items())
+        result, seen, position = [], 0, 0
+        for bound in bounds:
+            last = self._index(round(bound * 1e6))
+            while position < len(buckets) and buckets[position][0] <= last:
+                seen += buckets[position][1]
+                position += 1
+            result.append((bound, seen))
+        return result
+
+
+class ToolMetrics:
+    """
+    Per-tool call, error and latency metrics rendered in Prometheus text format
+    as `<prefix>_*` series.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._calls = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._upstream_errors = defaultdict(int)
+        self._tool_latency = defaultdict(LatencyHistogram)
+        self._upstream_latency = defaultdict(LatencyHistogram)
+
+    def record_call(self, tool: str, seconds: float, error: bool) -> None:
+        with self._lock:
+            self._calls[tool] += 1
+            if error:
+                self._errors[tool] += 1
+            self._tool_latency[tool].record(seconds)
+
+    def record_upstream(self, seconds: float, error: bool) -> None:
+        tool = current_tool.get()
+        with self._lock:
+            if error:
+                self._upstream_errors[tool] += 1
+            self._upstream_latency[tool].record(seconds)
+
+    @contextmanager
+    def upstream(self):
+        """Time a backend HTTP call on behalf of the current tool."""
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record_upstream(time.perf_counter() - started, error)
+
+    def instrument_server(self, server) -> None:
+        """Wrap the low-level CallToolRequest handler so every registered tool is timed."""
+        handler = server.request_handlers[types.CallToolRequest]
+
+        async def timed_handler(req: types.CallToolRequest):
+            token = current_tool.set(req.params.name)
+            started = time.perf_counter()
+            error = True
+            try:
+                result = await handler(req)
+                error = bool(getattr(result.root, "isError", False))
+                return result
+            finally:
+                self.record_call(req.params.name, time.perf_counter() - started, error)
+                current_tool.reset(token)
+
+        server.request_handlers[types.CallToolRequest] = timed_handler
+
+    @staticmethod
+    def _histogram_lines(name: str, histograms: dict) -> list:
+        lines = [f"# TYPE {name} histogram"]
+        for tool, histogram in sorted(histograms.items()):
+            for bound, count in histogram.cumulative():
+                lines.append(f'{name}_bucket{{tool="{tool}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{tool="{tool}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{tool="{tool}"}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{tool="{tool}"}} {histogram.count}')
+        return lines
+
+    @staticmethod
+    def _counter_lines(name: str, counters: dict) -> list:
+        lines = [f"# TYPE {name} counter"]
+        lines += [f'{name}{{tool="{tool}"}} {value}' for tool, value in sorted(counters.items())]
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            lines += self._counter_lines(f"{self.prefix}_tool_calls_total", self._calls)
+            lines += self._counter_lines(f"{self.prefix}_tool_errors_total", self._errors)
+            lines += self._histogram_lines(f"{self.prefix}_tool_duration_seconds", self._tool_latency)
+            lines += self._counter_lines(f"{self.prefix}_upstream_errors_total", self._upstream_errors)
+            lines += self._histogram_lines(f"{self.prefix}_upstream_duration_seconds", self._upstream_latency)
+        return "\n".join(lines) + "\n"
+
+
+tool_metrics = ToolMetrics("camara_mcp")
@@ -0,0 +1,306 @@
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields, replace
+
+import requests
+
+logger = logging.getLogger("camara-resilience")
+
+# Only these methods are retried or hedged; everything else is sent exactly once.
+IDEMPOTENT_METHODS = {"GET"}
+RETRYABLE_STATUS = {429, 502, 503, 504}
+# Most hedges that can be saved up and sent in a burst
+HEDGE_TOKEN_CAP = 10
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the backend while an endpoint's circuit is open."""
+
+
+@dataclass(frozen=True)
+class EndpointPolicy:
+    timeout: float = 5.0
+    retries: int = 2
+    backoff_base: float = 0.1
+    backoff_max: float = 1.0
+    hedge: bool = False
+    hedge_min_delay: float = 0.05
+    # Hedges per hedgeable request, at most (a token budget, so hedging cannot double the load)
+    hedge_budget: float = 0.1
+    # Circuit breaker: evaluated over the last `window_size` calls once `min_calls` were seen
+    window_size: int = 20
+    min_calls: int = 5
+    failure_rate_threshold: float = 0.5
+    slow_call_seconds: float = 2.0
+    slow_rate_threshold: float = 0.8
+    open_seconds: float = 15.0
+
+
+def load_policies(raw: str | None) -> dict:
+    """
+    Parse CAMARA_RESILIENCE_CONFIG, a JSON object mapping endpoint prefixes to
+    policy overrides, e.g. {"default": {"timeout": 3}, "/catalog": {"hedge": true}}.
+    """
+    policies = {"default": EndpointPolicy()}
+    if not raw:
+        return policies
+    try:
+        config = json.loads(raw)
+    except ValueError as e:
+        logger.error("Invalid CAMARA_RESILIENCE_CONFIG, using defaults: %s", e)
+        return policies
+
+    known = {f.name for f in fields(EndpointPolicy)}
+    default_overrides = {k: v for k, v in config.get("default", {}).items() if k in known}
+    policies["default"] = replace(EndpointPolicy(), **default_overrides)
+    for prefix, overrides in config.items():
+        if prefix == "default":
+            continue
+        policies[prefix] = replace(policies["default"], **{k: v for k, v in overrides.items() if k in known})
+    return policies
+
+
+def endpoint_key(endpoint: str) -> str:
+    """Group endpoints by API resource so `/sessions/<id>` calls share one breaker."""
+    parts = endpoint.split("?", 1)[0].rstrip("/").split("/")
+    if len(parts) > 5 and parts[1] == "apis":
+        return "/".join(parts[:5])
+    return "/".join(parts)
+
+
+class LatencyTracker:
+    """Keeps the most recent successful call durations to estimate a p95."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, duration: float) -> None:
+        with self._lock:
+            self._samples.append(duration)
+
+    def p95(self) -> float | None:
+        with self._lock:
+            if len(self._samples) < 20:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+class CircuitBreaker:
+    """Error-rate and slow-call-rate breaker over a sliding window of calls."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, policy: EndpointPolicy):
+        self.name = name
+        self.policy = policy
+        self.state = self.CLOSED
+        self._calls = deque(maxlen=policy.window_size)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.policy.open_seconds:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record(self, ok: bool, duration: float) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and duration < self.policy.slow_call_seconds:
+                    logger.info("Circuit %s closed", self.name)
+                    self.state = self.CLOSED
+                    self._calls.clear()
+                else:
+                    self._trip()
+                return
+
+            self._calls.append((ok, duration))
+            if len(self._calls) < self.policy.min_calls:
+                return
+            total = len(self._calls)
+            failures = sum(1 for call_ok, _ in self._calls if not call_ok)
+            slow = sum(1 for _, d in self._calls if d >= self.policy.slow_call_seconds)
+            if (failures / total >= self.policy.failure_rate_threshold
+                    or slow / total >= self.policy.slow_rate_threshold):
+                self._trip()
+
+    def _trip(self) -> None:
+        logger.warning("Circuit %s opened for %.1fs", self.name, self.policy.open_seconds)
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "window": len(self._calls), "rejected": self.rejected}
+
+
+class ResilientClient:
+    """
+    HTTP client for the CAMARA backend with per-endpoint circuit breakers,
+    jittered retries for idempotent requests and optional hedging.
+    """
+
+    def __init__(self, base_url: str, policies: dict, hedge_workers: int = 8):
+        self.base_url = base_url
+        self.policies = policies
+        self._session = requests.Session()
+        self._breakers = {}
+        self._latency = {}
+        self._lock = threading.Lock()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="camara-hedge")
+        self._hedge_tokens = 0.0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+        self.retries = 0
+
+    def policy_for(self, endpoint: str) -> EndpointPolicy:
+        matches = [prefix for prefix in self.policies if prefix != "default" and endpoint.startswith(prefix)]
+        if not matches:
+            return self.policies["default"]
+        return self.policies[max(matches, key=len)]
+
+    def _state_for(self, endpoint: str, policy: EndpointPolicy):
+        key = endpoint_key(endpoint)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(key, policy)
+                self._latency[key] = LatencyTracker()
+            return self._breakers[key], self._latency[key]
+
+    def _count(self, counter: str) -> None:
+        # Requests run concurrently in tool worker threads
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _send(self, method: str, url: str, params, data, timeout: float) -> requests.Response:
+        return self._session.request(method, url, params=params, json=data, timeout=timeout)
+
+    def _earn_hedge_token(self, policy: EndpointPolicy) -> None:
+        with self._lock:
+            self._hedge_tokens = min(HEDGE_TOKEN_CAP, self._hedge_tokens + policy.hedge_budget)
+
+    def _take_hedge_token(self) -> bool:
+        with self._lock:
+            if self._hedge_tokens < 1:
+                self.hedges_skipped += 1
+                return False
+            self._hedge_tokens -= 1
+            self.hedges_sent += 1
+            return True
+
+    def _send_hedged(self, method, url, params, data, policy, latency) -> requests.Response:
+        self._earn_hedge_token(policy)
+        p95 = latency.p95()
+        if p95 is None:
+            return self._send(method, url, params, data, policy.timeout)
+
+        outcomes = queue.SimpleQueue()
+
+        def attempt(name):
+            try:
+                outcomes.put((name, self._send(method, url, params, data, policy.timeout), None))
+            except BaseException as e:
+                outcomes.put((name, None, e))
+
+        # The primary starts at once in its own thread: it never queues behind hedges in the
+        # pool, so the p95 wait measures the request itself. This thread only waits for it.
+        threading.Thread(target=attempt, args=("primary",), name="camara-primary", daemon=True).start()
+        launched = 1
+        try:
+            outcome = outcomes.get(timeout=max(p95, policy.hedge_min_delay))
+        except queue.Empty:
+            if self._take_hedge_token():
+                self._hedge_pool.submit(attempt, "hedge")
+                launched += 1
+            outcome = outcomes.get()
+        # The first response wins; a failed attempt waits for the other one
+        if outcome[2] is not None and launched > 1:
+            outcome = outcomes.get()
+        name, response, error = outcome
+        if error is not None:
+            raise error
+        if name == "hedge":
+            self._count("hedges_won")
+        return response
+
+    @staticmethod
+    def _backoff(policy: EndpointPolicy, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(policy.backoff_max, policy.backoff_base * (2 ** attempt)))
+
+    def request(self, endpoint: str, method: str = "GET", params=None, data=None) -> requests.Response:
+        policy = self.policy_for(endpoint)
+        breaker, latency = self._state_for(endpoint, policy)
+        url = f"{self.base_url}{endpoint}"
+        idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + (policy.retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {breaker.name}, not calling backend")
+
+            started = time.monotonic()
+            try:
+                if idempotent and policy.hedge:
+                    response = self._send_hedged(method, url, params, data, policy, latency)
+                else:
+                    response = self._send(method, url, params, data, policy.timeout)
+            except requests.RequestException:
+                breaker.record(False, time.monotonic() - started)
+                if attempt + 1 >= attempts:
+                    raise
+            except BaseException:
+                # Not retried, but the breaker must still hear back (or a half-open probe never ends)
+                breaker.record(False, time.monotonic() - started)
+                raise
+            else:
+                duration = time.monotonic() - started
+                server_error = response.status_code >= 500
+                breaker.record(not server_error, duration)
+                if not server_error:
+                    latency.record(duration)
+                if response.status_code not in RETRYABLE_STATUS or attempt + 1 >= attempts:
+                    return response
+
+            self._count("retries")
+            delay = self._backoff(policy, attempt)
+            logger.debug("Retrying %s %s in %.3fs (attempt %d/%d)", method, endpoint, delay, attempt + 2, attempts)
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            circuits = {key: breaker.snapshot() for key, breaker in self._breakers.items()}
+            p95 = {key: tracker.p95() for key, tracker in self._latency.items()}
+            counters = {"retries": self.retries, "hedges_sent": self.hedges_sent, "hedges_won": self.hedges_won,
+                        "hedges_skipped": self.hedges_skipped}
+        return {
+            "circuits": circuits,
+            "p95_seconds": p95,
+            **counters,
+            "policies": {prefix: asdict(policy) for prefix, policy in self.policies.items()},
+        }
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from mcp.server.streamable_http import EventCallback, EventId, EventMessage, EventStore, StreamId
+from mcp.types import JSONRPCMessage
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryEventStore(EventStore):
+    """
+    Process-local event store for resumable streams: the last
+    `max_events_per_stream` events of the `max_streams` most recent streams.
+    """
+
+    def __init__(self, max_events_per_stream: int = 100, max_streams: int = 1000):
+        self.max_events_per_stream = max_events_per_stream
+        self.max_streams = max_streams
+        self._streams: "OrderedDict[StreamId, deque]" = OrderedDict()
+        self._index: dict[EventId, tuple[StreamId, int]] = {}
+        self._next_id = 0
+
+    def _forget(self, events) -> None:
+        for event_id, _, _ in events:
+            self._index.pop(event_id, None)
+
+    async def store_event(self, stream_id: StreamId, message: JSONRPCMessage) -> EventId:
+        self._next_id += 1
+        event_id = str(self._next_id)
+        events = self._streams.get(stream_id)
+        if events is None:
+            events = self._streams[stream_id] = deque()
+            while len(self._streams) > self.max_streams:
+                _, evicted = self._streams.popitem(last=False)
+                self._forget(evicted)
+        self._streams.move_to_end(stream_id)
+        if len(events) >= self.max_events_per_stream:
+            self._forget([events.popleft()])
+        events.append((event_id, self._next_id, message))
+        self._index[event_id] = (stream_id, self._next_id)
+        return event_id
+
+    async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> StreamId | None:
+        if last_event_id not in self._index:
+            logger.warning("Event %s not found, nothing to replay", last_event_id)
+            return None
+        stream_id, last_seq = self._index[last_event_id]
+        for event_id, seq, message in list(self._streams.get(stream_id, ())):
+            if seq > last_seq:
+                await send_callback(EventMessage(message, event_id))
+        return stream_id
+
+
+class SQLiteEventStore(EventStore):
+    """
+    Event store in a SQLite file (WAL mode) that several server processes on
+    one host can share. Events older than `ttl` seconds are pruned.
+    """
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str, ttl: float = 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mcp_events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, stream_id TEXT NOT NULL, "
+            "message TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS mcp_events_stream ON mcp_events (stream_id, id)")
+
+    def _insert(self, stream_id: StreamId, payload: str) -> int:
+        with self._lock:
+            now = time.time()
+            cursor = self._conn.execute(
+                "INSERT INTO mcp_events (stream_id, message, created) VALUES (?, ?, ?)",
+                (stream_id, payload, now),
+            )
+            self._inserts += 1
+            if self._inserts % self.PRUNE_EVERY == 0:
+                self._conn.execute("DELETE FROM mcp_events WHERE created < ?", (now - self.ttl,))
+            return cursor.lastrowid
+
+    def _events_after(self, event_id: int):
+        with self._lock:
+            row = self._conn.execute("SELECT stream_id FROM mcp_events WHERE id = ?", (event_id,)).fetchone()
+            if row is None:
+                return None, []
+            events = self._conn.execute(
+                "SELECT id, message FROM mcp_events WHERE stream_id = ? AND id > ? ORDER BY id",
+                (row[0], event_id),
+            ).fetchall()
+            return row[0], events
+
+    async def store_event(self, stream_id: StreamId, message: JSONRPCMessage) -> EventId:
+        payload = message.model_dump_json(by_alias=True, exclude_none=True)
+        return str(await asyncio.to_thread(self._insert, stream_id, payload))
+
+    async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> StreamId | None:
+        try:
+            event_id = int(last_event_id)
+        except ValueError:
+            return None
+        stream_id, events = await asyncio.to_thread(self._events_after, event_id)
+        if stream_id is None:
+            logger.warning("Event %s not found, nothing to replay", last_event_id)
+            return None
+        for row_id, payload in events:
+            await send_callback(EventMessage(JSONRPCMessage.model_validate_json(payload), str(row_id)))
+        return stream_id
+
+
+def create_event_store(url: str | None, ttl: float = 3600) -> EventStore | None:
+    """
+    Build the event store named by MCP_EVENT_STORE: "" or "none" disables
+    resumability, "memory" keeps events in-process, "sqlite:///path.db"
+    shares them between processes on one host.
+    """
+    if not url or url == "none":
+        return None
+    if url == "memory":
+        return InMemoryEventStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteEventStore(url[len("sqlite:///"):], ttl=ttl)
+    raise ValueError(f"Unsupported MCP_EVENT_STORE: {url!r}")
@@ -0,0 +1,77 @@
+import json
+import logging
+import threading
+
+logger = logging.getLogger("camara-singleflight")
+
+# Only requests without side effects may share a response
+SAFE_METHODS = {"GET", "HEAD"}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key runs the
+    function, callers arriving while it is in flight wait for and share its result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(method: str, endpoint: str, params=None) -> tuple:
+        # JSON so list or dict param values (unhashable) still give a stable key
+        return (method.upper(), endpoint, json.dumps(params or {}, sort_keys=True, default=str))
+
+    def do(self, key: tuple, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            logger.debug("Coalescing %s %s onto in-flight request", key[0], key[1])
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+        total = self.leaders + self.coalesced
+        return {
+            "upstream_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+            "coalesce_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,171 @@
+import contextvars
+import copy
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("camara-tool-cache")
+
+# Default freshness per read-only tool (seconds). Override with
+# TOOL_CACHE_TTLS="get_catalog=300,get_device_location=15"; a TTL of 0 disables caching.
+DEFAULT_TTLS = {
+    "get_catalog": 300.0,
+    "get_device_location": 15.0,
+    "check_reachability": 10.0,
+    "verify_number": 60.0,
+    "get_qod_session": 5.0,
+}
+
+
+def _parse_ttls(raw: str | None) -> dict:
+    ttls = dict(DEFAULT_TTLS)
+    if not raw:
+        return ttls
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            ttls[name.strip()] = float(value)
+        except ValueError:
+            logger.warning("Ignoring invalid cache TTL %r", item)
+    return ttls
+
+
+def _is_error(result) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+class ToolCache:
+    """
+    Read-through cache for MCP tool results.
+
+    Entries are fresh for the tool's TTL. For a further `stale_ttl` seconds the
+    stale value is still served while a background refresh fetches a new one.
+    The cache is bounded to `max_entries` and evicts least recently used entries.
+    Values are deep-copied on the way in and out, so a caller mutating a result
+    never changes what later callers are served.
+    """
+
+    def __init__(self, ttls: dict, stale_ttl: float = 30.0, max_entries: int = 1024, refresh_workers: int = 4):
+        self.ttls = ttls
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._refreshing: set = set()
+        # Bumped by invalidate(); a result fetched before an invalidation is not stored
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="tool-cache-refresh")
+        self._stats = defaultdict(lambda: {"hits": 0, "stale_hits": 0, "misses": 0, "invalidations": 0, "evictions": 0})
+
+    @staticmethod
+    def _key(tool: str, arguments: dict) -> tuple:
+        return (tool, tuple(sorted(arguments.items())))
+
+    def _store(self, key: tuple, value, generation: int) -> None:
+        with self._lock:
+            if self._generations[key[0]] != generation:
+                return
+            self._entries[key] = (copy.deepcopy(value), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._stats[evicted[0]]["evictions"] += 1
+
+    def _refresh(self, key: tuple, fn, args, kwargs, generation: int) -> None:
+        try:
+            result = fn(*args, **kwargs)
+            if not _is_error(result):
+                self._store(key, result, generation)
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", key[0], e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def cached(self, fn):
+        """Decorator caching a tool's result by its bound arguments."""
+        tool = fn.__name__
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            ttl = self.ttls.get(tool, 0)
+            if ttl <= 0:
+                return fn(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = self._key(tool, bound.arguments)
+            now = time.monotonic()
+
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    value, stored_at = entry
+                    age = now - stored_at
+                    if age < ttl:
+                        self._entries.move_to_end(key)
+                        self._stats[tool]["hits"] += 1
+                        return copy.deepcopy(value)
+                    if age < ttl + self.stale_ttl:
+                        self._entries.move_to_end(key)
+                        self._stats[tool]["stale_hits"] += 1
+                        if key not in self._refreshing:
+                            self._refreshing.add(key)
+                            # Run in the caller's context so upstream time is attributed to the tool
+                            self._executor.submit(contextvars.copy_context().run, self._refresh,
+                                                  key, fn, args, kwargs, self._generations[tool])
+                        return copy.deepcopy(value)
+                self._stats[tool]["misses"] += 1
+                generation = self._generations[tool]
+
+            result = fn(*args, **kwargs)
+            if not _is_error(result):
+                self._store(key, result, generation)
+            return result
+
+        return wrapper
+
+    def invalidate(self, tool: str, **arguments) -> int:
+        """
+        Drop cached entries of `tool`. With arguments, only entries whose
+        arguments match all of them are dropped.
+        """
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if key[0] == tool and all(dict(key[1]).get(k) == v for k, v in arguments.items())
+            ]
+            for key in keys:
+                del self._entries[key]
+            self._generations[tool] += 1
+            self._stats[tool]["invalidations"] += len(keys)
+        if keys:
+            logger.debug("Invalidated %d cached %s entries", len(keys), tool)
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = {}
+            for tool, counters in self._stats.items():
+                lookups = counters["hits"] + counters["stale_hits"] + counters["misses"]
+                served = counters["hits"] + counters["stale_hits"]
+                tools[tool] = {
+                    **counters,
+                    "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+                }
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "tools": tools}
+
+
+tool_cache = ToolCache(
+    ttls=_parse_ttls(os.getenv("TOOL_CACHE_TTLS")),
+    stale_ttl=float(os.getenv("TOOL_CACHE_STALE_SECONDS", "30")),
+    max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "1024")),
+)
@@ -0,0 +1,34 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Longest tool input echoed back to the client in a tool event
+TOOL_INPUT_PREVIEW_CHARS = 200
+
+
+def _chunk_text(chunk) -> str:
+    """Text of an AIMessageChunk, whose content is a string or a list of content parts."""
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+async def agent_events(agent, query):
+    """
+    Run `agent` on `query` and yield (event, data) pairs as they happen:
+    ("message", {"chunk": text}) for every LLM token chunk, and
+    ("tool", {"tool": name, "status": "start" | "end"}) around each tool call.
+    """
+    async for event in agent.stream_events(query):
+        kind = event.get("event")
+        if kind == "on_chat_model_stream":
+            text = _chunk_text(event["data"].get("chunk"))
+            if text:
+                yield "message", {"chunk": text}
+        elif kind == "on_tool_start":
+            tool_input = str(event["data"].get("input", ""))[:TOOL_INPUT_PREVIEW_CHARS]
+            logger.info("Tool %s started", event.get("name"))
+            yield "tool", {"tool": event.get("name"), "status": "start", "input": tool_input}
+        elif kind == "on_tool_end":
+            yield "tool", {"tool": event.get("name"), "status": "end"}
@@ -3,25 +3,38 @@ import logging
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from mcp_use import MCPAgent, MCPClient
+from cancellation import propagate_mcp_cancellation
+from llm_cache import llm_cache_options
+from llm_scheduler import scheduled
+from tool_cache import tool_schema_cache, use_cached_tools
 
 load_dotenv()
 logging.getLogger("mcp_use").setLevel(logging.ERROR)
 
-async def create_gemini_agent():
-    """Create an MCPAgent using Google Gemini backend."""
+async def create_gemini_agent(client: MCPClient | None = None):
+    """Create an MCPAgent using Google Gemini backend.
+
+    Pass a pooled `client` whose session is already initialized to skip the
+    MCP handshake; otherwise a new client and session are created. Tool
+    schemas are shared across agents through `tool_cache.tool_schema_cache`.
+    """
     MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash")
 
-    client = MCPClient({
-        "mcpServers": {"http": {"url": MCP_SERVER_URL}}
-    })
-    await client.create_session("http")
+    if client is None:
+        client = MCPClient(
+            {"mcpServers": {"http": {"url": MCP_SERVER_URL}}},
+            message_handler=tool_schema_cache.message_handler(MCP_SERVER_URL),
+        )
+        await client.create_session("http")
+        propagate_mcp_cancellation(client)
 
-    llm = ChatGoogleGenerativeAI(
+    llm = scheduled(ChatGoogleGenerativeAI, "gemini")(
         model=MODEL_NAME,
         temperature=0,
         google_api_key=GOOGLE_API_KEY,
+        **llm_cache_options(),
     )
 
     PROMPT = """
@@ -39,4 +52,5 @@ async def create_gemini_agent():
         max_retries_per_step=3,
         verbose=True,
     )
-    return agent
+    # Tools come from the process-wide schema cache instead of a tools/list per agent
+    return use_cached_tools(agent)
@@ -3,29 +3,42 @@ import logging
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 from mcp_use import MCPAgent, MCPClient
+from cancellation import propagate_mcp_cancellation
+from llm_cache import llm_cache_options
+from llm_scheduler import LLM_REQUEST_TIMEOUT, scheduled
+from tool_cache import tool_schema_cache, use_cached_tools
 
 load_dotenv()
 logging.getLogger("mcp_use").setLevel(logging.ERROR)
 
-async def create_groq_agent():
-    """Create an MCPAgent using Groq backend."""
+async def create_groq_agent(client: MCPClient | None = None):
+    """Create an MCPAgent using Groq backend.
+
+    Pass a pooled `client` whose session is already initialized to skip the
+    MCP handshake; otherwise a new client and session are created. Tool
+    schemas are shared across agents through `tool_cache.tool_schema_cache`.
+    """
     MCP_SERVER_URL = os.getenv("MCP_SERVER_URL")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     MODEL_NAME = os.getenv("GROQ_MODEL_NAME", "deepseek-r1-distill-llama-70b")
 
-    client = MCPClient({
-        "mcpServers": {"http": {"url": MCP_SERVER_URL}}
-    })
-    await client.create_session("http")
+    if client is None:
+        client = MCPClient(
+            {"mcpServers": {"http": {"url": MCP_SERVER_URL}}},
+            message_handler=tool_schema_cache.message_handler(MCP_SERVER_URL),
+        )
+        await client.create_session("http")
+        propagate_mcp_cancellation(client)
 
-    llm = ChatGroq(
+    llm = scheduled(ChatGroq, "groq")(
         model=MODEL_NAME,
         temperature=0,
         max_tokens=None,
         reasoning_format="parsed",
-        timeout=None,
+        timeout=LLM_REQUEST_TIMEOUT,
         max_retries=2,
-        api_key=GROQ_API_KEY
+        api_key=GROQ_API_KEY,
+        **llm_cache_options(),
     )
 
     PROMPT = """
@@ -43,4 +56,5 @@ async def create_groq_agent():
         max_retries_per_step=3,
         verbose=True,
     )
-    return agent
+    # Tools come from the process-wide schema cache instead of a tools/list per agent
+    return use_cached_tools(agent)
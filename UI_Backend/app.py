@@ -1,14 +1,19 @@
 import os
-import json
 import asyncio
 import logging
 from quart import Quart, request, jsonify, Response
 from quart_cors import cors
 from dotenv import load_dotenv
-import objgraph
 
 from agents.gemini_agent import create_gemini_agent
 from agents.groq_agent import create_groq_agent
+from mcp_pool import MCPSessionPool
+from tool_cache import tool_schema_cache
+from llm_scheduler import LLMSchedulerBusy, llm_request_context, scheduler_stats
+from cancellation import cancellation_stats, record_cancellation
+from agent_stream import agent_events
+from sse import sse_encoder
+from memory_telemetry import memory_telemetry, start_memory_telemetry
 
 # Load environment
 load_dotenv()
@@ -20,45 +25,66 @@ logging.basicConfig(level=logging.INFO)
 app = Quart(__name__)
 app = cors(app, allow_origin="*")
 
+# Pre-initialized MCP sessions shared by all agents (MCP_POOL_* settings)
+mcp_pool = MCPSessionPool(os.getenv("MCP_SERVER_URL"))
 
-# --- SSE Helper ---
-def sse_event(data, event="message", id=None, retry=None):
-    lines = []
-    if id is not None:
-        lines.append(f"id: {id}")
-    if event is not None:
-        lines.append(f"event: {event}")
-    if retry is not None:
-        lines.append(f"retry: {retry}")
 
-    if isinstance(data, str):
-        for line in data.splitlines():
-            lines.append(f"data: {line}")
-    else:
-        json_data = json.dumps(data)
-        for line in json_data.splitlines():
-            lines.append(f"data: {line}")
+@app.before_serving
+async def start_mcp_pool():
+    await mcp_pool.start()
+    start_memory_telemetry()
 
-    return "\n".join(lines) + "\n\n"
+
+@app.after_serving
+async def close_mcp_pool():
+    await memory_telemetry.stop()
+    await mcp_pool.close()
+
+
+# --- Agent Helper ---
+def llm_caller():
+    """(user, priority) for the LLM scheduler: fair queuing is per X-User-Id (or client address)."""
+    user = request.headers.get("X-User-Id") or request.remote_addr or "anonymous"
+    priority = "batch" if request.headers.get("X-Priority") == "batch" else "interactive"
+    return user, priority
+
+
+async def run_agent(create_agent, query, caller):
+    # The agent borrows a warm MCP session and returns it to the pool instead of closing it
+    # A client disconnect cancels this task, and with it the LLM call, MCP tool call and backend request
+    try:
+        with llm_request_context(*caller):
+            async with mcp_pool.client() as client:
+                agent = await create_agent(client)
+                return await agent.run(query)
+    except asyncio.CancelledError:
+        record_cancellation("agent_runs")
+        logging.info("Agent run cancelled by client disconnect")
+        raise
 
 
 # --- Common SSE Stream Helper ---
-async def stream_agent_response(agent, query):
-    chunk_size = 50
-    async def generator():
-        event_id = 0
+async def stream_agent_response(create_agent, query, caller):
+    async def events():
         try:
-            result = await agent.run(query)
-            for i in range(0, len(result), chunk_size):
-                yield sse_event({"chunk": result[i:i + chunk_size]}, id=event_id)
-                event_id += 1
-                await asyncio.sleep(0.01)
-            yield sse_event({"done": True}, event="complete", id=event_id)
+            # Tokens and tool calls are forwarded as the agent produces them
+            with llm_request_context(*caller):
+                async with mcp_pool.client() as client:
+                    agent = await create_agent(client)
+                    async for event in agent_events(agent, query):
+                        yield event
+            yield "complete", {"done": True}
+        except asyncio.CancelledError:
+            # The SSE encoder cancels this generator when the client goes away
+            record_cancellation("stream_requests")
+            logging.info("Agent stream cancelled by client disconnect")
+            raise
         except Exception as e:
-            yield sse_event({"error": str(e)}, event="error", id=event_id)
-        finally:
-            await agent.close()
-            logging.info("Agent closed after streaming")
+            yield "error", {"error": str(e)}
+
+    def generator():
+        # Encoded to bytes, with bursts of small events coalesced into one write
+        return sse_encoder.stream(events())
     return generator
 
 
@@ -70,15 +96,15 @@ async def gemini_query():
     if not query:
         return jsonify({"error": "No query provided"}), 400
 
-    agent = await create_gemini_agent()
     try:
-        result = await agent.run(query)
+        result = await run_agent(create_gemini_agent, query, llm_caller())
         return jsonify({"response": result})
+    except LLMSchedulerBusy as e:
+        # Fail fast instead of piling more calls onto a saturated provider
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         logging.error(f"Error in gemini_query: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
-    finally:
-        await agent.close()
 
 
 @app.route("/gemini-mcp/stream", methods=["GET"])
@@ -87,8 +113,7 @@ async def gemini_stream():
     if not query:
         return jsonify({"error": "No query provided"}), 400
 
-    agent = await create_gemini_agent()
-    generator = await stream_agent_response(agent, query)
+    generator = await stream_agent_response(create_gemini_agent, query, llm_caller())
     return Response(
         generator(),
         content_type="text/event-stream; charset=utf-8",
@@ -109,15 +134,15 @@ async def groq_query():
     if not query:
         return jsonify({"error": "No query provided"}), 400
 
-    agent = await create_groq_agent()
     try:
-        result = await agent.run(query)
+        result = await run_agent(create_groq_agent, query, llm_caller())
         return jsonify({"response": result})
+    except LLMSchedulerBusy as e:
+        # Fail fast instead of piling more calls onto a saturated provider
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         logging.error(f"Error in groq_query: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
-    finally:
-        await agent.close()
 
 
 @app.route("/groq-mcp/stream", methods=["GET"])
@@ -126,8 +151,7 @@ async def groq_stream():
     if not query:
         return jsonify({"error": "No query provided"}), 400
 
-    agent = await create_groq_agent()
-    generator = await stream_agent_response(agent, query)
+    generator = await stream_agent_response(create_groq_agent, query, llm_caller())
     return Response(
         generator(),
         content_type="text/event-stream; charset=utf-8",
@@ -154,14 +178,30 @@ async def health_check():
     })
 
 
-@app.route("/debug/objgraph", methods=["GET"])
-async def debug_objgraph():
-    import io, sys
-    buf = io.StringIO()
-    sys.stdout = buf
-    objgraph.show_growth(limit=10)
-    sys.stdout = sys.__stdout__
-    return Response(buf.getvalue(), mimetype="text/plain")
+@app.route("/debug/mcp-pool", methods=["GET"])
+async def debug_mcp_pool():
+    return jsonify(mcp_pool.stats())
+
+
+@app.route("/debug/tool-cache", methods=["GET"])
+async def debug_tool_cache():
+    return jsonify(tool_schema_cache.stats())
+
+
+@app.route("/debug/llm-scheduler", methods=["GET"])
+async def debug_llm_scheduler():
+    return jsonify(scheduler_stats())
+
+
+@app.route("/debug/cancellations", methods=["GET"])
+async def debug_cancellations():
+    return jsonify(cancellation_stats())
+
+
+@app.route("/debug/memory", methods=["GET"])
+async def debug_memory():
+    # Served from the sampler's ring buffer; ?last=0 returns every sample
+    return jsonify(memory_telemetry.stats(request.args.get("last", 1, type=int)))
 
 
 if __name__ == "__main__":
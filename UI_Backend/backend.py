@@ -1,4 +1,3 @@
-import json
 import asyncio
 import logging
 from quart import Quart, request, jsonify, Response
@@ -7,7 +6,11 @@ from dotenv import load_dotenv
 import os
 from langchain_google_genai import ChatGoogleGenerativeAI
 from mcp_use import MCPAgent, MCPClient
-import objgraph
+from agent_stream import agent_events
+from llm_scheduler import scheduled
+from cancellation import propagate_mcp_cancellation, record_cancellation
+from sse import sse_encoder
+from memory_telemetry import memory_telemetry, start_memory_telemetry
 
 logging.getLogger("mcp_use").setLevel(logging.ERROR)
 logging.basicConfig(level=logging.INFO)
@@ -18,25 +21,14 @@ app = cors(app, allow_origin="*")
 load_dotenv()
 
 
-#--- SSE Helper ---
-def sse_event(data, event="message", id=None, retry=None):
-    lines = []
-    if id is not None:
-        lines.append(f"id: {id}")
-    if event is not None:
-        lines.append(f"event: {event}")
-    if retry is not None:
-        lines.append(f"retry: {retry}")
+@app.before_serving
+async def start_telemetry():
+    start_memory_telemetry()
 
-    if isinstance(data, str):
-        for line in data.splitlines():
-            lines.append(f"data: {line}")
-    else:
-        json_data = json.dumps(data)
-        for line in json_data.splitlines():
-            lines.append(f"data: {line}")
 
-    return "\n".join(lines) + "\n\n"
+@app.after_serving
+async def stop_telemetry():
+    await memory_telemetry.stop()
 
 
 # --- Agent Creation ---
@@ -51,10 +43,11 @@ async def create_agent():
 
     # Automatically create a session for the server "http"
     await fresh_client.create_session("http")
+    propagate_mcp_cancellation(fresh_client)
 
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     MODEL_NAME = os.getenv("GEMINI_MODEL_NAME")
-    llm = ChatGoogleGenerativeAI(model=MODEL_NAME, temperature=0, google_api_key=GOOGLE_API_KEY)
+    llm = scheduled(ChatGoogleGenerativeAI, "gemini")(model=MODEL_NAME, temperature=0, google_api_key=GOOGLE_API_KEY)
 
     PROMPT = """
     You are an intelligent assistant that uses available tools to respond to user requests.
@@ -114,34 +107,32 @@ async def gemini_stream():
         return jsonify({"error": "No query provided"}), 400
 
     logging.info(f"📨 Received STREAM request with query: {query[:50]}...")
-    chunk_size = 50
 
-    async def generator():
-        event_id = 0
+    async def events():
         agent = await create_agent()
         try:
-            result = await agent.run(query)
-            logging.info(f"📤 Streaming {len(result)} chars for query: {query[:50]}...")
-
-            for i in range(0, len(result), chunk_size):
-                chunk = result[i:i + chunk_size]
-                yield sse_event({"chunk": chunk}, id=event_id)
-                event_id += 1
-                await asyncio.sleep(0.01)  # Yield control
+            # Forward tokens and tool calls as the agent produces them
+            async for event in agent_events(agent, query):
+                yield event
 
-            yield sse_event({"done": True}, event="complete", id=event_id)
+            yield "complete", {"done": True}
             logging.info(f"✅ Stream complete for: {query[:50]}...")
 
+        except asyncio.CancelledError:
+            record_cancellation("stream_requests")
+            logging.info(f"🛑 Stream cancelled by client disconnect: {query[:50]}...")
+            raise
+
         except Exception as e:
             logging.error(f"❌ Stream error for query '{query[:50]}': {e}", exc_info=True)
-            yield sse_event({"error": str(e)}, event="error", id=event_id)
+            yield "error", {"error": str(e)}
 
         finally:
             await agent.close()
             logging.info("🧹 Agent closed after streaming")
 
     return Response(
-        generator(),
+        sse_encoder.stream(events()),
         content_type="text/event-stream; charset=utf-8",
         headers={
             "Cache-Control": "no-cache",
@@ -159,18 +150,9 @@ async def gemini_stream():
 async def health_check():
     return jsonify({"status": "healthy", "service": "gemini-mcp"})
 
-@app.route("/debug/objgraph", methods=["GET"])
-async def debug_objgraph():
-    import io
-    import sys
-    import objgraph
-
-    buf = io.StringIO()
-    sys.stdout = buf
-    objgraph.show_growth(limit=10)
-    sys.stdout = sys.__stdout__
-
-    return Response(buf.getvalue(), mimetype="text/plain")
+@app.route("/debug/memory", methods=["GET"])
+async def debug_memory():
+    return jsonify(memory_telemetry.stats(request.args.get("last", 1, type=int)))
 
 
 if __name__ == "__main__":
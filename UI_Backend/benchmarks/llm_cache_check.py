@@ -0,0 +1,43 @@
+"""
+Round-trip check for `llm_cache.SQLiteLLMCache`: a generation stored in
+readwrite mode comes back from lookup (also in replay mode), and a replay
+miss raises LLMCacheMiss.
+
+    cd UI_Backend && python -m benchmarks.llm_cache_check
+"""
+import os
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from llm_cache import LLMCacheMiss, SQLiteLLMCache
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+        generation = ChatGeneration(message=AIMessage(content="cached answer", usage_metadata={
+            "input_tokens": 3, "output_tokens": 2, "total_tokens": 5}))
+
+        cache = SQLiteLLMCache(path, "readwrite")
+        assert cache.lookup("prompt", "llm") is None
+        cache.update("prompt", "llm", [generation])
+
+        replay = SQLiteLLMCache(path, "replay")
+        started = time.perf_counter()
+        hit = replay.lookup("prompt", "llm")
+        elapsed = time.perf_counter() - started
+        assert hit == [generation], hit
+        try:
+            replay.lookup("other prompt", "llm")
+        except LLMCacheMiss:
+            pass
+        else:
+            raise AssertionError("replay miss did not raise LLMCacheMiss")
+        print(f"ok: hit in {elapsed * 1000:.2f} ms, {replay.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Regression check for `llm_scheduler.ProviderScheduler`: a queued call that is
+cancelled (client disconnect) just as the running call releases its slot must
+not leak the slot.
+
+With one slot, the holder cancels a queued waiter and then releases after 0..5
+event-loop iterations, which covers the window in which the waiter's future is
+cancelled but the waiter is still queued. Every round must leave nothing in
+flight and let the next call in.
+
+    cd UI_Backend && python -m benchmarks.llm_scheduler_check
+"""
+import asyncio
+
+from llm_scheduler import ProviderScheduler
+
+
+async def cancel_then_release(scheduler: ProviderScheduler, yields: int) -> None:
+    holding = asyncio.Event()
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(1):
+            holding.set()
+            await release.wait()
+
+    async def queued():
+        async with scheduler.slot(1):
+            raise AssertionError("a cancelled waiter was granted a slot")
+
+    holder_task = asyncio.create_task(holder())
+    await holding.wait()
+    queued_task = asyncio.create_task(queued())
+    await asyncio.sleep(0)  # queued_task is now waiting for the slot
+
+    queued_task.cancel()
+    for _ in range(yields):
+        await asyncio.sleep(0)
+    release.set()
+    await holder_task  # raised InvalidStateError when the race hit
+    try:
+        await queued_task
+    except asyncio.CancelledError:
+        pass
+
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0 and stats["queued"] == 0, stats
+    async with scheduler.slot(1):
+        pass
+
+
+async def main():
+    scheduler = ProviderScheduler("check", max_concurrency=1, queue_timeout=1)
+    for yields in range(6):
+        await asyncio.wait_for(cancel_then_release(scheduler, yields), 5)
+    print(f"ok: {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
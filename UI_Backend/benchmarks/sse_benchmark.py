@@ -0,0 +1,106 @@
+"""
+Events/sec per SSE connection: the previous per-event string formatter
+(one write and one disconnect check per event) against `sse.SSEEncoder`.
+
+A fake agent yields `--events` token-sized message events; a fake ASGI
+transport counts writes and yields to the event loop on every send, like a
+real server would. Both streams are parsed back to check they carry the
+same events.
+
+    cd UI_Backend && python -m benchmarks.sse_benchmark --events 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sse import SSEEncoder
+
+
+def legacy_sse_event(data, event="message", id=None, retry=None):
+    lines = []
+    if id is not None:
+        lines.append(f"id: {id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    for line in json.dumps(data).splitlines():
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def fake_agent(count: int):
+    for i in range(count):
+        yield "message", {"chunk": f"tok{i % 97} "}
+        if i % 16 == 0:
+            # The model hands over tokens in small bursts
+            await asyncio.sleep(0)
+    yield "complete", {"done": True}
+
+
+async def is_disconnected() -> bool:
+    await asyncio.sleep(0)
+    return False
+
+
+async def legacy_stream(count: int):
+    event_id = 0
+    async for event, data in fake_agent(count):
+        if await is_disconnected():
+            return
+        yield legacy_sse_event(data, event=event, id=event_id).encode()
+        event_id += 1
+
+
+async def consume(stream) -> tuple[float, int, bytes]:
+    """Drive `stream` like a server: one awaited send per chunk. Returns (seconds, writes, body)."""
+    writes, body = 0, []
+    started = time.perf_counter()
+    async for chunk in stream:
+        writes += 1
+        body.append(chunk)
+        await asyncio.sleep(0)
+    return time.perf_counter() - started, writes, b"".join(body)
+
+
+def parse(body: bytes) -> list:
+    events = []
+    for block in body.decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if fields:
+            events.append((fields.get("event"), json.loads(fields["data"])))
+    return events
+
+
+async def run(args) -> None:
+    encoder = SSEEncoder(flush_window=args.flush_ms / 1000, disconnect_check_interval=1.0)
+    results = {}
+    for name, make_stream in (
+        ("legacy", lambda: legacy_stream(args.events)),
+        ("encoder", lambda: encoder.stream(fake_agent(args.events), is_disconnected=is_disconnected)),
+    ):
+        best = None
+        for _ in range(args.repeat):
+            result = await consume(make_stream())
+            if best is None or result[0] < best[0]:
+                best = result
+        results[name] = best
+        seconds, writes, body = best
+        print(f"{name:8s} {args.events / seconds:12,.0f} events/s  {writes:7d} writes  {len(body):9d} bytes")
+
+    if parse(results["legacy"][2]) != parse(results["encoder"][2]):
+        raise SystemExit("FAIL: encoded streams differ")
+    print(f"speedup {results['legacy'][0] / results['encoder'][0]:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--flush-ms", type=float, default=20.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+
+from mcp.types import CancelledNotification, CancelledNotificationParams, ClientNotification
+
+logger = logging.getLogger(__name__)
+
+# How long a cancelled MCP request may spend telling the server to stop
+CANCEL_NOTIFY_TIMEOUT = 1.0
+
+_stats = {"agent_runs": 0, "stream_requests": 0, "mcp_requests": 0}
+
+
+def record_cancellation(kind: str) -> None:
+    _stats[kind] += 1
+
+
+def cancellation_stats() -> dict:
+    return dict(_stats)
+
+
+def _propagate(session) -> None:
+    if getattr(session, "_propagates_cancellation", False):
+        return
+    send_request = session.send_request
+
+    async def send_request_propagating_cancellation(request, *args, **kwargs):
+        request_id = session._request_id  # the id send_request is about to use
+        try:
+            return await send_request(request, *args, **kwargs)
+        except asyncio.CancelledError:
+            record_cancellation("mcp_requests")
+            notification = ClientNotification(CancelledNotification(
+                method="notifications/cancelled",
+                params=CancelledNotificationParams(requestId=request_id, reason="Client disconnected"),
+            ))
+            try:
+                await asyncio.wait_for(asyncio.shield(session.send_notification(notification)), CANCEL_NOTIFY_TIMEOUT)
+            except Exception as e:
+                logger.debug("Could not send MCP cancellation for request %s: %s", request_id, e)
+            raise
+
+    session.send_request = send_request_propagating_cancellation
+    session._propagates_cancellation = True
+
+
+def propagate_mcp_cancellation(client) -> None:
+    """
+    When a request on one of `client`'s MCP sessions is cancelled, send
+    notifications/cancelled so the server also stops the tool call and the
+    backend request it made.
+    """
+    for session in client.get_all_active_sessions().values():
+        _propagate(session.connector.client_session)
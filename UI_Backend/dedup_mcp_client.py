@@ -1,119 +1,343 @@
 import asyncio
 import hashlib
+import heapq
+import itertools
 import json
 import logging
+import os
+import re
+import unicodedata
+import weakref
+from contextvars import ContextVar
+from collections import OrderedDict
+
+from langchain_core.messages import SystemMessage
 from mcp_use import MCPAgent, MCPClient
 
+from llm_scheduler import current_caller
+
 logger = logging.getLogger(__name__)
 
+DEDUP_CACHE_TTL = float(os.getenv("DEDUP_CACHE_TTL", "5"))
+DEDUP_CACHE_MAX_ENTRIES = int(os.getenv("DEDUP_CACHE_MAX_ENTRIES", "1024"))
+# Tools whose results may be served from the cache (besides readOnlyHint tools)
+DEDUP_SAFE_TOOL_PREFIXES = tuple(p for p in os.getenv("DEDUP_SAFE_TOOL_PREFIXES", "get_,list_").split(",") if p)
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+QUERY_CACHE_MAX_ANSWER_CHARS = int(os.getenv("QUERY_CACHE_MAX_ANSWER_CHARS", "20000"))
+# Answers that used no tool, and answers built from read-only tools without a TTL of their own
+QUERY_CACHE_NO_TOOL_TTL = float(os.getenv("QUERY_CACHE_NO_TOOL_TTL", "600"))
+QUERY_CACHE_TOOL_TTL = float(os.getenv("QUERY_CACHE_TOOL_TTL", "30"))
+
+
+def _parse_tool_ttls(raw: str | None) -> dict:
+    """Per-tool TTLs in seconds, e.g. '{"get_app_definitions": 300, "get_qod_session": 10}'."""
+    if not raw:
+        return {}
+    try:
+        ttls = json.loads(raw)
+        if not isinstance(ttls, dict):
+            raise ValueError("expected a JSON object")
+        return {str(name): float(ttl) for name, ttl in ttls.items()}
+    except (TypeError, ValueError) as e:
+        logger.warning("Ignoring invalid QUERY_CACHE_TOOL_TTLS %r: %s", raw, e)
+        return {}
+
+
+QUERY_CACHE_TOOL_TTLS = _parse_tool_ttls(os.getenv("QUERY_CACHE_TOOL_TTLS"))
+
+
+# -------------------------------
+# Request coalescing + result cache
+# -------------------------------
+class RequestCoalescer:
+    """
+    Coalesces identical in-flight requests onto one call, and caches results
+    of cacheable requests for `ttl` seconds.
+
+    Expiry is driven by a min-heap, and the cache holds at most `max_entries`
+    results, evicting the least recently used. Not thread-safe: use one
+    instance per event loop and purpose (`for_running_loop`).
+    """
+
+    _per_loop = weakref.WeakKeyDictionary()
+
+    def __init__(self, ttl: float = DEDUP_CACHE_TTL, max_entries: int = DEDUP_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._waiters: dict[asyncio.Task, int] = {}  # callers awaiting each in-flight call
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (result, expires_at)
+        self._expiry = []  # (expires_at, seq, key); stale items are skipped when popped
+        self._seq = itertools.count()
+        self._generation = 0  # bumped by invalidate(); results of older calls are not stored
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "cancelled": 0, "evictions": 0, "expirations": 0,
+                       "invalidations": 0}
+
+    @classmethod
+    def for_running_loop(cls, name: str = "default", **kwargs) -> "RequestCoalescer":
+        """The `name` coalescer of the running event loop, created with `kwargs` on first use."""
+        coalescers = cls._per_loop.setdefault(asyncio.get_running_loop(), {})
+        coalescer = coalescers.get(name)
+        if coalescer is None:
+            coalescer = coalescers[name] = cls(**kwargs)
+        return coalescer
+
+    def _expire(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, _, key = heapq.heappop(self._expiry)
+            entry = self._results.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self._results[key]
+                self._stats["expirations"] += 1
+
+    def _store(self, key: str, result, expires_at: float) -> None:
+        self._results[key] = (result, expires_at)
+        self._results.move_to_end(key)
+        heapq.heappush(self._expiry, (expires_at, next(self._seq), key))
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+            self._stats["evictions"] += 1
+        if len(self._expiry) > 2 * self.max_entries:
+            # Drop heap items for evicted or overwritten entries
+            self._expiry = [(exp, seq, k) for exp, seq, k in self._expiry
+                            if k in self._results and self._results[k][1] == exp]
+            heapq.heapify(self._expiry)
+
+    def invalidate(self) -> None:
+        """Drop every cached result, including those of calls still in flight."""
+        self._generation += 1
+        self._results.clear()
+        self._expiry.clear()
+        self._stats["invalidations"] += 1
+
+    async def run(self, key: str, call, cacheable: bool = False, ttl_for=None):
+        """
+        Return `await call()`, sharing the call with identical in-flight
+        requests and, if `cacheable`, with those in the next `ttl` seconds.
+        `ttl_for(result)` can choose another TTL per result; 0 skips caching.
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if cacheable:
+            self._expire(now)
+            entry = self._results.get(key)
+            if entry is not None:
+                self._results.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+            logger.info("🔄 Coalescing request %s", key[:8])
+        else:
+            self._stats["misses"] += 1
+            task = self._in_flight[key] = loop.create_task(call())
+            generation = self._generation
+
+            def done(t: asyncio.Task) -> None:
+                self._in_flight.pop(key, None)
+                if t.cancelled() or t.exception() is not None or generation != self._generation:
+                    return
+                ttl = ttl_for(t.result()) if cacheable and ttl_for else self.ttl
+                if cacheable and ttl > 0:
+                    self._store(key, t.result(), loop.time() + ttl)
+
+            task.add_done_callback(done)
+        # A cancelled caller must not cancel the call other callers are waiting on,
+        # but the call is cancelled once nobody waits for it any more
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                task.cancel()
+                self._stats["cancelled"] += 1
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "hit_ratio": (self._stats["hits"] + self._stats["coalesced"]) / lookups if lookups else 0.0,
+            "in_flight": len(self._in_flight),
+            "cached": len(self._results),
+        }
+
+
+def is_read_only_tool(connectors, name: str) -> bool:
+    """Tools whose results may be reused: readOnlyHint tools, or names starting with DEDUP_SAFE_TOOL_PREFIXES."""
+    for connector in connectors:
+        for tool in connector._tools or ():
+            if tool.name == name and tool.annotations and tool.annotations.readOnlyHint:
+                return True
+    return name.startswith(DEDUP_SAFE_TOOL_PREFIXES)
+
+
+def _query_cache() -> RequestCoalescer:
+    return RequestCoalescer.for_running_loop("agent_queries", max_entries=QUERY_CACHE_MAX_ENTRIES)
+
+
+def invalidate_caches() -> None:
+    """After a tool that may have changed state: drop cached tool results and answers of this loop."""
+    RequestCoalescer.for_running_loop().invalidate()
+    _query_cache().invalidate()
+
+
 # -------------------------------
 # Deduplication MCP Client
 # -------------------------------
 class DedupMCPClient(MCPClient):
     """
-    MCPClient subclass with request-level deduplication.
-    Skips duplicate POST/GET/DELETE requests within a short TTL window.
+    MCPClient subclass with request-level deduplication of read-only tool
+    calls: identical concurrent calls share one request, and results are
+    reused for DEDUP_CACHE_TTL seconds. Other tools are always called.
     """
-    _dedup_cache = {}
-    _cache_lock = asyncio.Lock()
-    _CACHE_TTL = 5.0  # seconds
+
+    TRANSIENT_FIELDS = ("startedAt", "expiresAt", "timestamp", "createdAt", "updatedAt")
 
     def _hash_request(self, method: str, endpoint: str, payload: dict | None):
         """Normalize payload and generate a hash key."""
-        if payload is None:
-            payload = {}
+        payload = payload or {}
 
         # Remove transient fields that change each request
-        norm_payload = json.loads(json.dumps(payload))
-        for key in ["sessionId", "startedAt", "expiresAt", "timestamp", "createdAt", "updatedAt"]:
-            if key in norm_payload:
-                norm_payload[key] = "<normalized>"
+        norm_payload = {key: "<normalized>" if key in self.TRANSIENT_FIELDS else value
+                        for key, value in payload.items()}
 
         normalized = json.dumps({
             "method": method.upper(),
             "endpoint": endpoint.strip().lower(),
             "payload": norm_payload,
-        }, sort_keys=True)
+        }, sort_keys=True, default=str)
 
         return hashlib.md5(normalized.encode()).hexdigest()
 
-    async def _cleanup_cache(self):
-        """Remove expired cache entries."""
-        async with self._cache_lock:
-            now = asyncio.get_event_loop().time()
-            expired_keys = [
-                key for key, (_, t) in self._dedup_cache.items()
-                if now - t > self._CACHE_TTL
-            ]
-            for key in expired_keys:
-                self._dedup_cache.pop(key, None)
-
-    async def _dedup_call(self, method, endpoint, payload=None, *args, **kwargs):
-        key = self._hash_request(method, endpoint, payload)
-        await self._cleanup_cache()
-
-        async with self._cache_lock:
-            if key in self._dedup_cache:
-                fut, _ = self._dedup_cache[key]
-                logger.info(f"🔄 Deduplicating {method} {endpoint}")
-                return await fut
-
-            fut = asyncio.Future()
-            self._dedup_cache[key] = (fut, asyncio.get_event_loop().time())
+    async def create_session(self, server_name: str, auto_initialize: bool = True):
+        session = await super().create_session(server_name, auto_initialize)
+        connector = session.connector
+        call_tool = connector.call_tool
 
-        try:
-            result = await super()._send_request(method, endpoint, payload, *args, **kwargs)
-            fut.set_result(result)
-            return result
-        except Exception as e:
-            fut.set_exception(e)
-            raise
-        finally:
-            asyncio.create_task(self._cleanup_cache())
+        async def dedup_call_tool(name, arguments, read_timeout_seconds=None):
+            if not is_read_only_tool((connector,), name):
+                # Every call of a tool with side effects must reach the server: never shared
+                try:
+                    return await call_tool(name, arguments, read_timeout_seconds)
+                finally:
+                    invalidate_caches()
+            key = self._hash_request("TOOL", f"{getattr(connector, 'base_url', server_name)}/{name}", arguments)
+            return await RequestCoalescer.for_running_loop().run(
+                key,
+                lambda: call_tool(name, arguments, read_timeout_seconds),
+                cacheable=True,
+                ttl_for=lambda result: 0 if result.isError else DEDUP_CACHE_TTL,
+            )
 
-    # --- Override MCPClient methods ---
-    async def get(self, endpoint, *args, **kwargs):
-        return await self._dedup_call("GET", endpoint, None, *args, **kwargs)
-
-    async def post(self, endpoint, payload=None, *args, **kwargs):
-        return await self._dedup_call("POST", endpoint, payload, *args, **kwargs)
-
-    async def delete(self, endpoint, payload=None, *args, **kwargs):
-        return await self._dedup_call("DELETE", endpoint, payload, *args, **kwargs)
+        connector.call_tool = dedup_call_tool
+        return session
 
 
 # -------------------------------
 # Deduplication MCP Agent
 # -------------------------------
-class DedupMCPAgent(MCPAgent):
+# International numbers only (leading +, E.164: at most 15 digits), so separate digit groups
+# such as "device 1234 5678" are never merged
+_PHONE_NUMBER = re.compile(r"\+\d(?:[\s().-]{0,2}\d){6,14}")
+_IPV4_ADDRESS = re.compile(r"\b(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})\b")
+_tools_used: ContextVar[list | None] = ContextVar("tools_used", default=None)
+
+
+def normalize_query(query: str) -> str:
     """
-    MCPAgent subclass with query-level deduplication.
-    Prevents running the same logical query multiple times concurrently.
+    Canonical form of a user query: case, Unicode forms and whitespace are
+    folded, international phone numbers lose their separators and IPv4 addresses their
+    leading zeros, and trailing punctuation is dropped.
+    """
+    text = unicodedata.normalize("NFKC", query).casefold()
+    text = _IPV4_ADDRESS.sub(lambda m: ".".join(str(int(octet)) for octet in m.groups()), text)
+    text = _PHONE_NUMBER.sub(lambda m: "+" + re.sub(r"\D", "", m.group()), text)
+    return " ".join(text.split()).rstrip("?!. ")
+
+
+def answer_ttl(tools_used: list[str], connectors=()) -> float:
+    """How long an answer built with `tools_used` may be reused; 0 if any of them may have changed state."""
+    if not tools_used:
+        return QUERY_CACHE_NO_TOOL_TTL
+    if not all(is_read_only_tool(connectors, name) for name in tools_used):
+        return 0
+    return min(QUERY_CACHE_TOOL_TTLS.get(name, QUERY_CACHE_TOOL_TTL) for name in tools_used)
+
+
+class DedupMCPAgent(MCPAgent):
     """
-    _active_queries = {}
-    _lock = asyncio.Lock()
+    MCPAgent subclass with query-level deduplication and caching.
+    Identical (normalized) queries share one run while in flight, and the
+    answer is reused without calling the LLM for `answer_ttl` seconds,
+    unless a mutating tool was called. Any mutating tool call drops every
+    cached answer. Answers are only shared between agents with the same
+    model, settings, system prompt and servers, and within one caller
+    (`llm_request_context`).
 
-    async def run(self, query_str: str):
-        key = hashlib.md5(query_str.strip().encode()).hexdigest()
+    Opt-in: the app's routes use plain MCPAgent; build one with
+    `create_dedup_agent`.
+    """
 
-        async with self._lock:
-            if key in self._active_queries:
-                logger.info(f"🔄 Deduplicating agent run for query {key[:8]}...")
-                return await self._active_queries[key]
+    def _connectors(self) -> list:
+        if self.client:
+            return [session.connector for session in self.client.get_all_active_sessions().values()]
+        return self.connectors
 
-            fut = asyncio.Future()
-            self._active_queries[key] = fut
+    async def stream(self, query, *args, **kwargs):
+        tools_used = _tools_used.get()
+        async for item in super().stream(query, *args, **kwargs):
+            if isinstance(item, tuple):
+                if tools_used is not None:
+                    tools_used.append(item[0].tool)
+                # DedupMCPClient already does this; other clients rely on the agent
+                if not is_read_only_tool(self._connectors(), item[0].tool):
+                    invalidate_caches()
+            yield item
 
+    async def _run_tracked(self, query_str: str, **kwargs) -> tuple:
+        tools_used = []
+        token = _tools_used.set(tools_used)
         try:
-            result = await super().run(query_str)
-            fut.set_result(result)
-            return result
-        except Exception as e:
-            fut.set_exception(e)
-            raise
+            return await super().run(query_str, **kwargs), tools_used
         finally:
-            async with self._lock:
-                self._active_queries.pop(key, None)
+            _tools_used.reset(token)
+
+    def _ttl_for(self, outcome) -> float:
+        result, tools_used = outcome
+        if not isinstance(result, str) or len(result) > QUERY_CACHE_MAX_ANSWER_CHARS:
+            return 0
+        return answer_ttl(tools_used, self._connectors())
+
+    async def run(self, query_str: str, **kwargs):
+        # Answers that depend on earlier turns or custom options are not shared
+        history = kwargs.get("external_history") or self.get_conversation_history()
+        if any(not isinstance(message, SystemMessage) for message in history) or kwargs.get("output_schema"):
+            return await super().run(query_str, **kwargs)
+
+        servers = sorted(str(connector.public_identifier) for connector in self._connectors())
+        system_message = self._system_message.content if self._system_message else self.system_prompt
+        settings = {
+            "model": [self._model_provider, self._model_name, getattr(self.llm, "_identifying_params", None)],
+            "max_steps": self.max_steps,
+            "disallowed_tools": sorted(self.disallowed_tools),
+            "use_server_manager": self.use_server_manager,
+        }
+        key = hashlib.md5(json.dumps(
+            [settings, system_message, servers, current_caller(), normalize_query(query_str)],
+            sort_keys=True, default=str,
+        ).encode()).hexdigest()
+        result, tools_used = await _query_cache().run(
+            key, lambda: self._run_tracked(query_str, **kwargs), cacheable=True, ttl_for=self._ttl_for,
+        )
+        return result
 
 
 # -------------------------------
@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 from mcp_use import MCPClient, MCPAgent
 from langchain_google_genai import ChatGoogleGenerativeAI
+from llm_scheduler import scheduled
 
 # Optional Ollama agent
 try:
@@ -30,7 +31,7 @@ Instructions:
 """
 
 
-llm = ChatGoogleGenerativeAI(model=MODEL_NAME, temperature=0, google_api_key=GOOGLE_API_KEY)
+llm = scheduled(ChatGoogleGenerativeAI, "gemini")(model=MODEL_NAME, temperature=0, google_api_key=GOOGLE_API_KEY)
 
 
 
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+logger = logging.getLogger(__name__)
+
+# LLM_CACHE_MODE: off (default); readwrite: serve hits, record misses; record: always
+# call the LLM and overwrite; replay: serve hits only, a miss is an error (no network calls)
+LLM_CACHE_MODES = ("off", "readwrite", "record", "replay")
+DEFAULT_LLM_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".llm_cache.sqlite")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a prompt was never recorded."""
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    LangChain LLM cache in a SQLite file. The key is a hash of the model
+    settings (model name, parameters and the bound tool schemas, i.e. the
+    `llm_string`) and the serialized messages; values are zlib-compressed.
+    """
+
+    def __init__(self, path: str = DEFAULT_LLM_CACHE_PATH, mode: str = "readwrite"):
+        if mode not in LLM_CACHE_MODES[1:]:
+            raise ValueError(f"Unsupported LLM_CACHE_MODE: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        if self.mode == "record":
+            return None
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._stats["misses"] += 1
+            if self.mode == "replay":
+                raise LLMCacheMiss(f"No recorded LLM response for key {key[:12]} in {self.path}")
+            return None
+        self._stats["hits"] += 1
+        return loads(zlib.decompress(row[0]).decode())
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        if self.mode == "replay":
+            return
+        value = zlib.compress(dumps(list(return_val)).encode())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created) VALUES (?, ?, ?)",
+                (self._key(prompt, llm_string), value, time.time()),
+            )
+        self._stats["writes"] += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        return {**self._stats, "mode": self.mode, "path": self.path}
+
+
+_cache: SQLiteLLMCache | None = None
+
+
+def llm_cache_options() -> dict:
+    """
+    Keyword arguments for a LangChain chat model: the shared disk cache
+    selected by LLM_CACHE_MODE, or nothing when it is off. Streaming is
+    disabled on cached models, since LangChain bypasses the cache when
+    streaming.
+    """
+    global _cache
+    # Read at call time, after the agents have loaded .env
+    mode = os.getenv("LLM_CACHE_MODE", "off").lower()
+    if mode == "off":
+        return {}
+    if _cache is None:
+        path = os.getenv("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH)
+        _cache = SQLiteLLMCache(path, mode)
+        logger.info("LLM cache in %s mode at %s", mode, path)
+    return {"cache": _cache, "disable_streaming": True}
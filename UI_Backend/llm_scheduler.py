@@ -0,0 +1,290 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Defaults for every provider; override per provider with LLM_<PROVIDER>_CONCURRENCY etc.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))  # 0: no budget
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+# Output tokens assumed per call when estimating its cost up front
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "512"))
+
+PRIORITIES = ("interactive", "batch")
+
+_request_context: ContextVar[tuple] = ContextVar("llm_request_context", default=("interactive", "anonymous"))
+
+
+class LLMSchedulerBusy(RuntimeError):
+    """The provider's queue is full or the request waited too long for a slot."""
+
+
+@contextmanager
+def llm_request_context(user: str = "anonymous", priority: str = "interactive"):
+    """Attribute the LLM calls made inside the block to `user` with `priority`."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}, expected one of {PRIORITIES}")
+    token = _request_context.set((priority, user))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def current_caller() -> str:
+    """The user LLM calls in this context are attributed to."""
+    return _request_context.get()[1]
+
+
+class _Waiter:
+    __slots__ = ("future", "tokens", "priority", "user", "enqueued")
+
+    def __init__(self, future, tokens, priority, user):
+        self.future = future
+        self.tokens = tokens
+        self.priority = priority
+        self.user = user
+        self.enqueued = time.monotonic()
+
+
+class _Slot:
+    """Granted slot; set `used_tokens` once the provider reports usage."""
+
+    def __init__(self):
+        self.used_tokens = None
+
+
+class ProviderScheduler:
+    """
+    Admission control for one LLM provider: at most `max_concurrency` calls
+    in flight and `tokens_per_minute` estimated tokens (token bucket, 0 for
+    no budget).
+
+    Waiting calls are served by priority class, and round-robin across users
+    within a class. A call is rejected with LLMSchedulerBusy at once when
+    `max_queue` calls are already waiting, or after `queue_timeout` seconds
+    without a slot.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int = LLM_CONCURRENCY,
+                 tokens_per_minute: int = LLM_TOKENS_PER_MINUTE, max_queue: int = LLM_MAX_QUEUE,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}  # user -> deque of waiters
+        self._queued = 0
+        self._in_flight = 0
+        self._tokens = float(tokens_per_minute)
+        self._refilled = time.monotonic()
+        self._timer = None
+        self._stats = {"granted": 0, "rejected_queue_full": 0, "rejected_timeout": 0, "cancelled": 0, "tokens_used": 0}
+        self._waits = {priority: {"count": 0, "total": 0.0, "max": 0.0} for priority in PRIORITIES}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute,
+                               self._tokens + (now - self._refilled) * self.tokens_per_minute / 60)
+        self._refilled = now
+
+    def _head(self):
+        for priority in PRIORITIES:
+            users = self._queues[priority]
+            if users:
+                user, waiters = next(iter(users.items()))
+                return users, user, waiters
+        return None
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        while self._in_flight < self.max_concurrency:
+            head = self._head()
+            if head is None:
+                return
+            users, user, waiters = head
+            waiter = waiters[0]
+            if waiter.future.done():
+                # Cancelled (client disconnected) before it was granted: never hand it a slot
+                self._dequeue(waiter)
+                continue
+            if self.tokens_per_minute and waiter.tokens > self._tokens:
+                delay = (waiter.tokens - self._tokens) * 60 / self.tokens_per_minute
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            waiters.popleft()
+            self._queued -= 1
+            # This user goes to the back of its class
+            if waiters:
+                users.move_to_end(user)
+            else:
+                del users[user]
+            self._tokens -= waiter.tokens
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        users = self._queues[waiter.priority]
+        waiters = users.get(waiter.user)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del users[waiter.user]
+
+    def _release(self, estimated: int, used: int | None) -> None:
+        self._in_flight -= 1
+        if used is not None:
+            self._stats["tokens_used"] += used
+            if self.tokens_per_minute:
+                self._tokens -= used - estimated
+        self._dispatch()
+
+    def _record_wait(self, waiter: _Waiter) -> None:
+        waited = time.monotonic() - waiter.enqueued
+        stats = self._waits[waiter.priority]
+        stats["count"] += 1
+        stats["total"] += waited
+        stats["max"] = max(stats["max"], waited)
+
+    @asynccontextmanager
+    async def slot(self, tokens: int):
+        """Wait for a slot for a call estimated at `tokens` tokens."""
+        priority, user = _request_context.get()
+        if self.tokens_per_minute:
+            # A call larger than the whole budget would otherwise never run
+            tokens = min(tokens, self.tokens_per_minute)
+        if self._queued >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            raise LLMSchedulerBusy(f"{self.provider}: {self._queued} LLM calls already queued")
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens, priority, user)
+        self._queues[priority].setdefault(user, deque()).append(waiter)
+        self._queued += 1
+        self._dispatch()
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except BaseException as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up: hand the slot and its tokens back
+                self._release(tokens, 0)
+            else:
+                self._dequeue(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._stats["rejected_timeout"] += 1
+                raise LLMSchedulerBusy(f"{self.provider}: no LLM slot within {self.queue_timeout}s") from None
+            if isinstance(e, asyncio.CancelledError):
+                self._stats["cancelled"] += 1
+            raise
+
+        self._record_wait(waiter)
+        self._stats["granted"] += 1
+        slot = _Slot()
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            self._stats["cancelled"] += 1
+            raise
+        finally:
+            self._release(tokens, slot.used_tokens)
+
+    def stats(self) -> dict:
+        self._refill()
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": round(self._tokens) if self.tokens_per_minute else None,
+            "queue_wait_seconds": {
+                priority: {**stats, "avg": stats["total"] / stats["count"] if stats["count"] else 0.0}
+                for priority, stats in self._waits.items()
+            },
+        }
+
+
+_schedulers: dict[str, ProviderScheduler] = {}
+_scheduled_classes: dict[tuple, type] = {}
+
+
+def get_scheduler(provider: str) -> ProviderScheduler:
+    """Process-wide scheduler for `provider`, configured from LLM_<PROVIDER>_* env vars."""
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        prefix = f"LLM_{provider.upper()}_"
+        scheduler = _schedulers[provider] = ProviderScheduler(
+            provider,
+            max_concurrency=int(os.getenv(prefix + "CONCURRENCY", LLM_CONCURRENCY)),
+            tokens_per_minute=int(os.getenv(prefix + "TPM", LLM_TOKENS_PER_MINUTE)),
+            max_queue=int(os.getenv(prefix + "MAX_QUEUE", LLM_MAX_QUEUE)),
+            queue_timeout=float(os.getenv(prefix + "QUEUE_TIMEOUT", LLM_QUEUE_TIMEOUT)),
+        )
+    return scheduler
+
+
+def scheduler_stats() -> dict:
+    return {provider: scheduler.stats() for provider, scheduler in _schedulers.items()}
+
+
+def estimate_tokens(messages, kwargs: dict) -> int:
+    """Rough token count of a chat call (about 4 characters per token) plus the expected output."""
+    chars = sum(len(str(message.content)) for message in messages)
+    if kwargs.get("tools"):
+        chars += len(json.dumps(kwargs["tools"], default=str))
+    return chars // 4 + LLM_EXPECTED_OUTPUT_TOKENS
+
+
+def _used_tokens(result) -> int | None:
+    for generation in result.generations:
+        usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+        if usage:
+            return usage.get("total_tokens")
+    return None
+
+
+def scheduled(chat_model_cls, provider: str):
+    """
+    Subclass of the LangChain chat model class `chat_model_cls` whose provider
+    calls go through the `provider` scheduler. Cache hits skip the scheduler.
+    Built once per (class, provider): creating a pydantic model class is slow.
+    """
+    key = (chat_model_cls, provider)
+    if key in _scheduled_classes:
+        return _scheduled_classes[key]
+
+    class Scheduled(chat_model_cls):
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            async with get_scheduler(provider).slot(estimate_tokens(messages, kwargs)) as slot:
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                slot.used_tokens = _used_tokens(result)
+                return result
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            async with get_scheduler(provider).slot(estimate_tokens(messages, kwargs)) as slot:
+                async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    usage = getattr(chunk.message, "usage_metadata", None)
+                    if usage:
+                        slot.used_tokens = (slot.used_tokens or 0) + usage.get("total_tokens", 0)
+                    yield chunk
+
+    Scheduled.__name__ = Scheduled.__qualname__ = chat_model_cls.__name__
+    Scheduled.__module__ = chat_model_cls.__module__
+    _scheduled_classes[key] = Scheduled
+    return Scheduled
@@ -3,8 +3,8 @@ from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import asyncio
-import json
 from gemini_mcp import create_agent
+from sse import sse_encoder
 
 
 app = FastAPI(
@@ -29,34 +29,16 @@ class QueryRequest(BaseModel):
 
 # --- Helper Functions ---
 
-def format_sse(data: str, event: str = None) -> str:
-    """Helper function to create SSE formatted messages."""
-    msg = f"data: {data}\n"
-    if event:
-        msg = f"event: {event}\n{msg}"
-    return f"{msg}\n"
-
-
-async def stream_agent_response(agent, query, request: Request = None):
-    """Async generator for streaming responses using Server-Sent Events (SSE)."""
+async def stream_agent_response(agent, query):
+    """Async generator of (event, data) pairs for the agent's response, encoded to SSE by `sse_encoder`."""
     if agent is None:
-        yield format_sse(json.dumps({"error": "Agent is not initialized or available"}), event="error")
+        yield "error", {"error": "Agent is not initialized or available"}
         return
 
     try:
-        # Check if client disconnected
-        if request and await request.is_disconnected():
-            print("Client disconnected before streaming started")
-            return
-
         # Check if the agent supports the astream coroutine
         if hasattr(agent, 'astream'):
             async for chunk in agent.astream(query):
-                # Check for client disconnect during streaming
-                if request and await request.is_disconnected():
-                    print("Client disconnected during streaming")
-                    break
-
                 # Process the chunk content
                 content = None
                 if hasattr(chunk, 'content'):
@@ -67,10 +49,7 @@ async def stream_agent_response(agent, query, request: Request = None):
                     content = chunk.get("content", str(chunk))
 
                 if content:
-                    yield format_sse(json.dumps({"chunk": content}))
-
-                # Yield control to the event loop
-                await asyncio.sleep(0.01)
+                    yield "message", {"chunk": content}
 
         elif hasattr(agent, 'run'):
             # Fallback for non-streaming agents with async run
@@ -81,20 +60,11 @@ async def stream_agent_response(agent, query, request: Request = None):
             result_str = str(result)
             chunk_size = 50
             for i in range(0, len(result_str), chunk_size):
-                # Check for client disconnect
-                if request and await request.is_disconnected():
-                    print("Client disconnected during fallback streaming")
-                    break
-
-                chunk = result_str[i:i + chunk_size]
-                yield format_sse(json.dumps({"chunk": chunk}))
-                await asyncio.sleep(0.05)
+                yield "message", {"chunk": result_str[i:i + chunk_size]}
         else:
             raise Exception("Agent does not support streaming or async execution")
 
-        # Only send completion if client is still connected
-        if not request or not await request.is_disconnected():
-            yield format_sse(json.dumps({"done": True}), event="complete")
+        yield "complete", {"done": True}
 
     except asyncio.CancelledError:
         print("Stream cancelled by client disconnect")
@@ -102,7 +72,7 @@ async def stream_agent_response(agent, query, request: Request = None):
     except Exception as e:
         # Stream the error message
         print(f"Streaming error occurred: {e}")
-        yield format_sse(json.dumps({"error": str(e)}), event="error")
+        yield "error", {"error": str(e)}
     finally:
         # Clean up agent resources if it has a cleanup method
         if hasattr(agent, 'cleanup'):
@@ -155,7 +125,7 @@ async def gemini_stream_endpoint(request_data: QueryRequest, request: Request):
         agent = None
         try:
             # Send initial connection keepalive
-            yield format_sse(json.dumps({"status": "connected"}), event="connection")
+            yield "connection", {"status": "connected"}
 
             # Create and properly initialize agent
             agent = create_agent()
@@ -168,18 +138,18 @@ async def gemini_stream_endpoint(request_data: QueryRequest, request: Request):
             if hasattr(agent, 'initialize'):
                 await agent.initialize()
 
-            yield format_sse(json.dumps({"status": "streaming"}), event="status")
+            yield "status", {"status": "streaming"}
 
             # Stream the response
-            async for message in stream_agent_response(agent, query, request):
-                yield message
+            async for event in stream_agent_response(agent, query):
+                yield event
 
         except asyncio.CancelledError:
             print("Stream generation cancelled")
             # Don't yield error on cancellation, just clean up
         except Exception as e:
             print(f"Error in gemini_stream_endpoint: {e}")
-            yield format_sse(json.dumps({"error": str(e)}), event="error")
+            yield "error", {"error": str(e)}
         finally:
             # Clean up agent resources
             if agent and hasattr(agent, 'cleanup'):
@@ -188,8 +158,9 @@ async def gemini_stream_endpoint(request_data: QueryRequest, request: Request):
                 except Exception as cleanup_error:
                     print(f"Cleanup error: {cleanup_error}")
 
+    # Disconnects are polled by the encoder every SSE_DISCONNECT_CHECK_INTERVAL seconds, not per chunk
     return StreamingResponse(
-        generate(),
+        sse_encoder.stream(generate(), is_disconnected=request.is_disconnected),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache, no-transform",
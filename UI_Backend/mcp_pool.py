@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from mcp_use import MCPClient
+
+from cancellation import propagate_mcp_cancellation
+from tool_cache import tool_schema_cache
+
+logger = logging.getLogger(__name__)
+
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "8"))
+MCP_POOL_WARM = int(os.getenv("MCP_POOL_WARM", "2"))
+MCP_POOL_IDLE_TIMEOUT = float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "300"))
+MCP_POOL_HEALTH_INTERVAL = float(os.getenv("MCP_POOL_HEALTH_INTERVAL", "30"))
+MCP_POOL_ACQUIRE_TIMEOUT = float(os.getenv("MCP_POOL_ACQUIRE_TIMEOUT", "10"))
+SERVER_NAME = "http"
+
+
+class MCPSessionPool:
+    """
+    Bounded pool of MCPClients whose session to one MCP server is already
+    initialized (handshake done, tools listed), borrowed by one agent at a time.
+
+    Idle clients are pinged every `health_interval` seconds; those idle longer
+    than `idle_timeout` are closed down to `warm` clients. A client returned
+    from a cancelled request, or whose connection dropped, is discarded.
+    """
+
+    def __init__(self, url: str, size: int = MCP_POOL_SIZE, warm: int = MCP_POOL_WARM,
+                 idle_timeout: float = MCP_POOL_IDLE_TIMEOUT, health_interval: float = MCP_POOL_HEALTH_INTERVAL,
+                 acquire_timeout: float = MCP_POOL_ACQUIRE_TIMEOUT):
+        self.url = url
+        self.size = size
+        self.warm = min(warm, size)
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.acquire_timeout = acquire_timeout
+        self._idle = deque()  # (client, returned_at), most recently returned last
+        self._open_count = 0  # idle + borrowed + being opened
+        self._in_use = 0
+        self._cond = asyncio.Condition()
+        self._maintenance = None
+        self._stats = {
+            "acquired": 0,
+            "handshakes": 0,
+            "handshakes_avoided": 0,
+            "discarded": 0,
+            "acquire_timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    async def _open(self) -> MCPClient:
+        client = MCPClient({"mcpServers": {SERVER_NAME: {"url": self.url}}},
+                           message_handler=tool_schema_cache.message_handler(self.url))
+        await client.create_session(SERVER_NAME)
+        propagate_mcp_cancellation(client)
+        self._stats["handshakes"] += 1
+        return client
+
+    @staticmethod
+    def _is_healthy(client: MCPClient) -> bool:
+        sessions = client.get_all_active_sessions()
+        return bool(sessions) and all(session.is_connected for session in sessions.values())
+
+    @staticmethod
+    async def _close(client: MCPClient) -> None:
+        try:
+            await client.close_all_sessions()
+        except Exception as e:
+            logger.debug("Error closing pooled MCP client: %s", e)
+
+    def _discard(self, client: MCPClient) -> None:
+        # Caller holds the condition lock
+        self._open_count -= 1
+        self._stats["discarded"] += 1
+        asyncio.create_task(self._close(client))
+
+    def _record_wait(self, started: float) -> None:
+        waited = time.monotonic() - started
+        self._stats["acquired"] += 1
+        self._stats["wait_seconds_total"] += waited
+        self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+        self._in_use += 1
+
+    async def acquire(self) -> MCPClient:
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+        async with self._cond:
+            while True:
+                while self._idle:
+                    client, _ = self._idle.pop()
+                    if self._is_healthy(client):
+                        self._stats["handshakes_avoided"] += 1
+                        self._record_wait(started)
+                        return client
+                    self._discard(client)
+                if self._open_count < self.size:
+                    self._open_count += 1
+                    break
+                try:
+                    await asyncio.wait_for(self._cond.wait(), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    self._stats["acquire_timeouts"] += 1
+                    raise TimeoutError(f"No MCP session available within {self.acquire_timeout}s") from None
+
+        try:
+            client = await self._open()
+        except BaseException:
+            async with self._cond:
+                self._open_count -= 1
+                self._cond.notify()
+            raise
+        async with self._cond:
+            self._record_wait(started)
+        return client
+
+    async def release(self, client: MCPClient, discard: bool = False) -> None:
+        async with self._cond:
+            self._in_use -= 1
+            if discard or not self._is_healthy(client):
+                self._discard(client)
+            else:
+                self._idle.append((client, time.monotonic()))
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def client(self):
+        """Borrow a warm client for the duration of the block."""
+        client = await self.acquire()
+        discard = False
+        try:
+            yield client
+        except (asyncio.CancelledError, GeneratorExit):
+            # A request may still be in flight on this session (cancelled
+            # request, or a streaming response closed by the client)
+            discard = True
+            raise
+        finally:
+            await self.release(client, discard=discard)
+
+    async def _top_up(self) -> None:
+        async with self._cond:
+            missing = min(self.warm - len(self._idle), self.size - self._open_count)
+            self._open_count += max(missing, 0)
+        results = await asyncio.gather(*(self._open() for _ in range(max(missing, 0))), return_exceptions=True)
+        async with self._cond:
+            for result in results:
+                if isinstance(result, BaseException):
+                    self._open_count -= 1
+                    logger.warning("Could not open warm MCP session to %s: %s", self.url, result)
+                else:
+                    self._idle.appendleft((result, time.monotonic()))
+            self._cond.notify_all()
+
+    async def _ping(self, client: MCPClient) -> bool:
+        try:
+            for session in client.get_all_active_sessions().values():
+                await asyncio.wait_for(session.connector.client_session.send_ping(), self.health_interval)
+            return True
+        except Exception as e:
+            logger.info("Dropping unhealthy pooled MCP session: %s", e)
+            return False
+
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            now = time.monotonic()
+            async with self._cond:
+                # Oldest first; keep at least `warm` idle clients
+                while len(self._idle) > self.warm and now - self._idle[0][1] > self.idle_timeout:
+                    client, _ = self._idle.popleft()
+                    self._open_count -= 1
+                    asyncio.create_task(self._close(client))
+                snapshot = [client for client, _ in self._idle]
+            for client in snapshot:
+                if not await self._ping(client):
+                    async with self._cond:
+                        entry = next((item for item in self._idle if item[0] is client), None)
+                        if entry is not None:
+                            self._idle.remove(entry)
+                            self._discard(client)
+            await self._top_up()
+
+    async def start(self) -> None:
+        """Open `warm` sessions and start health checks."""
+        await self._top_up()
+        self._maintenance = asyncio.create_task(self._maintain())
+        logger.info("MCP session pool ready: %d warm session(s) to %s", len(self._idle), self.url)
+
+    async def close(self) -> None:
+        if self._maintenance:
+            self._maintenance.cancel()
+        async with self._cond:
+            idle = [client for client, _ in self._idle]
+            self._idle.clear()
+            self._open_count -= len(idle)
+        await asyncio.gather(*(self._close(client) for client in idle))
+
+    def stats(self) -> dict:
+        acquired = self._stats["acquired"]
+        return {
+            **self._stats,
+            "wait_seconds_avg": self._stats["wait_seconds_total"] / acquired if acquired else 0.0,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "open": self._open_count,
+            "size": self.size,
+        }
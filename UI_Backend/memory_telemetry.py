@@ -0,0 +1,232 @@
+import asyncio
+import functools
+import gc
+import importlib
+import logging
+import os
+import resource
+import time
+import tracemalloc
+import weakref
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Off by default: when on, tracked classes are patched process-wide and tracemalloc runs in bursts
+MEMORY_TELEMETRY = os.getenv("MEMORY_TELEMETRY", "false").lower() in ("1", "true", "yes")
+MEMORY_TELEMETRY_INTERVAL = float(os.getenv("MEMORY_TELEMETRY_INTERVAL", "30"))
+# tracemalloc runs only for this long in each interval (0: trace continuously and diff snapshots)
+MEMORY_TELEMETRY_TRACE_SECONDS = float(os.getenv("MEMORY_TELEMETRY_TRACE_SECONDS", "5"))
+MEMORY_TELEMETRY_SAMPLES = int(os.getenv("MEMORY_TELEMETRY_SAMPLES", "120"))  # ring buffer size
+MEMORY_TELEMETRY_TOP = int(os.getenv("MEMORY_TELEMETRY_TOP", "10"))
+# Traceback depth kept by tracemalloc; 1 (the allocating line) is the cheapest
+MEMORY_TELEMETRY_FRAMES = int(os.getenv("MEMORY_TELEMETRY_FRAMES", "1"))
+# module:Class types whose live instances are counted (the ones that leaked with anyio streams)
+MEMORY_TRACKED_TYPES = os.getenv("MEMORY_TRACKED_TYPES", ",".join([
+    "anyio.streams.memory:MemoryObjectSendStream",
+    "anyio.streams.memory:_MemoryObjectStreamState",
+    "asyncio:Event",
+    "contextlib:_AsyncGeneratorContextManager",
+    "contextlib:_GeneratorContextManager",
+    "anyio._backends._asyncio:TaskState",
+]))
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+
+class InstanceCounter:
+    """
+    Live instance counts of selected classes. Each class's __init__ is wrapped
+    to add the new object to a WeakSet, so counting costs one set insert per
+    instance and reading a count is len(), with no heap walk. Only instances
+    created after `track` are seen; subclass instances are not counted.
+
+    The wrapping is global: it monkey-patches the class (e.g. asyncio.Event)
+    for the whole process, and is never undone.
+    """
+
+    def __init__(self):
+        self._live: dict[str, weakref.WeakSet] = {}
+
+    def track(self, cls: type) -> None:
+        name = cls.__name__
+        if name in self._live:
+            return
+        if not cls.__weakrefoffset__:
+            logger.warning("Cannot count %s instances: the class does not support weak references", name)
+            return
+        live = self._live[name] = weakref.WeakSet()
+        original = cls.__init__
+
+        @functools.wraps(original)
+        def __init__(self, *args, **kwargs):
+            original(self, *args, **kwargs)
+            if type(self) is cls:
+                live.add(self)
+
+        cls.__init__ = __init__
+
+    def track_spec(self, spec: str) -> None:
+        module_name, _, class_name = spec.strip().partition(":")
+        try:
+            self.track(getattr(importlib.import_module(module_name), class_name))
+        except (ImportError, AttributeError) as e:
+            logger.warning("Cannot count %s instances: %s", spec, e)
+
+    def counts(self) -> dict:
+        return {name: len(live) for name, live in self._live.items()}
+
+
+class MemoryTelemetry:
+    """
+    Background memory sampler. Every `interval` seconds it appends a sample
+    (RSS, traced memory, tracked instance counts, asyncio task count and the
+    `top` allocation sites that grew most) to a ring buffer of `max_samples`.
+    Reading samples never touches the heap.
+
+    Allocation tracing has a cost on every allocation, so by default it runs
+    in bursts: tracemalloc is started for `trace_seconds` per interval, and
+    the growth is what was allocated in that window and is still alive. With
+    `trace_seconds` 0 (or tracemalloc already started elsewhere) it traces
+    continuously and diffs consecutive snapshots. Snapshots are processed
+    off the event loop.
+    """
+
+    def __init__(self, interval: float = MEMORY_TELEMETRY_INTERVAL, max_samples: int = MEMORY_TELEMETRY_SAMPLES,
+                 top: int = MEMORY_TELEMETRY_TOP, frames: int = MEMORY_TELEMETRY_FRAMES,
+                 tracked_types: str = MEMORY_TRACKED_TYPES, trace_seconds: float = MEMORY_TELEMETRY_TRACE_SECONDS):
+        self.interval = interval
+        self.trace_seconds = min(trace_seconds, interval)
+        self.top = top
+        self.frames = frames
+        self.instances = InstanceCounter()
+        for spec in filter(str.strip, tracked_types.split(",")):
+            self.instances.track_spec(spec)
+        self._samples = deque(maxlen=max_samples)
+        self._snapshot = None
+        self._task = None
+        self._started_tracemalloc = False
+
+    def _diff(self, keep: bool = True) -> list:
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        previous = self._snapshot
+        if keep:
+            self._snapshot = snapshot
+        if previous is None:
+            stats = snapshot.statistics("lineno")
+        else:
+            stats = [stat for stat in snapshot.compare_to(previous, "lineno") if stat.size_diff > 0]
+        return [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "size_diff_kb": round(getattr(stat, "size_diff", stat.size) / 1024, 1),
+                "count": stat.count,
+                "count_diff": getattr(stat, "count_diff", stat.count),
+            }
+            for stat in stats[:self.top]
+        ]
+
+    async def _snapshot_stats(self, keep: bool = True) -> tuple:
+        started = time.perf_counter()
+        # Snapshot grouping and diffing are pure Python: keep them off the event loop
+        top_growth = await asyncio.to_thread(self._diff, keep)
+        traced, peak = tracemalloc.get_traced_memory()
+        return top_growth, traced, peak, time.perf_counter() - started
+
+    async def _trace_burst(self) -> tuple:
+        tracemalloc.start(self.frames)
+        try:
+            await asyncio.sleep(self.trace_seconds)
+            return await self._snapshot_stats(keep=False)
+        finally:
+            tracemalloc.stop()
+
+    async def sample(self) -> dict:
+        if tracemalloc.is_tracing():
+            top_growth, traced, peak, seconds = await self._snapshot_stats()
+        elif self.trace_seconds > 0:
+            top_growth, traced, peak, seconds = await self._trace_burst()
+        else:
+            top_growth, traced, peak, seconds = [], 0, 0, 0.0
+        sample = {
+            "timestamp": time.time(),
+            "rss_mb": round(_rss_mb(), 2),
+            "traced_mb": round(traced / 2**20, 2),
+            "traced_peak_mb": round(peak / 2**20, 2),
+            "asyncio_tasks": len(asyncio.all_tasks()),
+            "gc_counts": gc.get_count(),
+            "instances": self.instances.counts(),
+            "top_growth": top_growth,
+            "sample_seconds": round(seconds, 4),
+        }
+        self._samples.append(sample)
+        return sample
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.warning("Memory telemetry sample failed: %s", e)
+            await asyncio.sleep(self.interval - self.trace_seconds)
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        if self.trace_seconds <= 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._snapshot = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def samples(self, last: int | None = None) -> list:
+        samples = list(self._samples)
+        return samples[-last:] if last else samples
+
+    def stats(self, last: int | None = 1) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "interval": self.interval,
+            "trace_seconds": self.trace_seconds,
+            "tracemalloc_frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else 0,
+            "samples": self.samples(last),
+        }
+
+
+# Created at import so instances are counted from app startup
+memory_telemetry = MemoryTelemetry(tracked_types=MEMORY_TRACKED_TYPES if MEMORY_TELEMETRY else "")
+
+
+def start_memory_telemetry() -> None:
+    """Start sampling in the running loop unless MEMORY_TELEMETRY is off."""
+    if MEMORY_TELEMETRY:
+        memory_telemetry.start()
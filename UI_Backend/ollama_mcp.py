@@ -2,6 +2,8 @@ import os
 from dotenv import load_dotenv
 from langchain_ollama import ChatOllama
 from mcp_use import MCPAgent, MCPClient
+from llm_cache import llm_cache_options
+from llm_scheduler import scheduled
 
 # Load environment variables
 load_dotenv()
@@ -21,9 +23,10 @@ config = {"mcpServers": {"http": {"url": MCP_SERVER_URL}}}
 client = MCPClient(config)
 
 # Ollama LLM setup
-llm = ChatOllama(
+llm = scheduled(ChatOllama, "ollama")(
     model=OLLAMA_MODEL,
     temperature=1,
+    **llm_cache_options(),
 )
 
 prompt = f"""
@@ -1,14 +1,12 @@
 import requests
-import re
 import time
-import psutil
 import csv
 import os
 from collections import defaultdict
 from datetime import datetime
 import pytz
 
-URL = "http://127.0.0.1:9009/debug/objgraph"
+URL = os.getenv("MEMORY_MONITOR_URL", "http://127.0.0.1:9013/debug/memory")
 INTERVAL = 5  # seconds between polls
 LOG_FILE = "memory_monitor_log_greece.csv"
 
@@ -33,34 +31,41 @@ if not os.path.exists(LOG_FILE):
         writer.writerow(header)
 
 
-def parse_objgraph_output(text):
-    """Extract object names and total counts from objgraph output"""
-    pattern = r"(\w+)\s+(\d+)\s+\+\d+"
-    return {name: int(total) for name, total in re.findall(pattern, text)}
+def latest_sample(payload):
+    """Latest sample from the /debug/memory ring buffer, or None before the first one"""
+    samples = payload.get("samples") or []
+    return samples[-1] if samples else None
 
 
-process = psutil.Process()
 tz_greece = pytz.timezone("Europe/Athens")
+last_logged = None
 
 print(f"📊 Starting Greece-time memory monitor — logging to {LOG_FILE}")
 print(f"Polling {URL} every {INTERVAL} seconds...\nPress Ctrl+C to stop.\n")
 
 while True:
     try:
-        # Request data from Quart debug endpoint
-        resp = requests.get(URL, timeout=5)
+        # Request the server's latest memory sample
+        resp = requests.get(URL, params={"last": 1}, timeout=5)
         resp.raise_for_status()
-        data = parse_objgraph_output(resp.text)
+        sample = latest_sample(resp.json())
+        # The server samples every MEMORY_TELEMETRY_INTERVAL: log each sample once
+        if sample is None or sample["timestamp"] == last_logged:
+            time.sleep(INTERVAL)
+            continue
+        last_logged = sample["timestamp"]
+        data = sample["instances"]
 
         # Greece-local timestamp
-        timestamp_greece = datetime.now(tz_greece).strftime("%Y-%m-%d %H:%M:%S")
+        timestamp_greece = datetime.fromtimestamp(sample["timestamp"], tz_greece).strftime("%Y-%m-%d %H:%M:%S")
 
-        rss = process.memory_info().rss / (1024 * 1024)  # MB
+        # RSS of the server process, not of this monitor
+        rss = sample["rss_mb"]
 
         # Prepare row with counts for interesting objects
         row = [timestamp_greece, rss]
         for name in INTERESTING:
-            value = data.get(name, counts[name][-1] if counts[name] else 0)
+            value = data.get(name, data.get("_" + name, counts[name][-1] if counts[name] else 0))
             counts[name].append(value)
             row.append(value)
 
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SSE_FLUSH_WINDOW = float(os.getenv("SSE_FLUSH_WINDOW", "0.02"))
+SSE_MAX_BATCH_BYTES = int(os.getenv("SSE_MAX_BATCH_BYTES", "16384"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "256"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
+SSE_DISCONNECT_CHECK_INTERVAL = float(os.getenv("SSE_DISCONNECT_CHECK_INTERVAL", "1.0"))
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+
+_END = object()
+_KEEP_ALIVE = b": keep-alive\n\n"
+
+
+def encode_event(data, event: str | None = "message", id=None, retry: int | None = None) -> bytes:
+    """Encode one SSE event as bytes. Non-string data is sent as compact single-line JSON."""
+    parts = []
+    if id is not None:
+        parts.append(b"id: %s\n" % str(id).encode())
+    if event is not None:
+        parts.append(b"event: %s\n" % event.encode())
+    if retry is not None:
+        parts.append(b"retry: %d\n" % retry)
+    if isinstance(data, str):
+        for line in data.splitlines() or [""]:
+            parts.append(b"data: %s\n" % line.encode())
+    else:
+        parts.append(b"data: %s\n" % json.dumps(data, separators=(",", ":")).encode())
+    parts.append(b"\n")
+    return b"".join(parts)
+
+
+class SSEEncoder:
+    """
+    Turns an async iterator of (event, data) pairs into SSE bytes for a
+    streaming response.
+
+    - The first event after a quiet period is sent at once; events arriving
+      within `flush_window` seconds of the previous write are coalesced into
+      one write of at most `max_batch_bytes`.
+    - The producer runs ahead by at most `queue_size` events: when the client
+      reads slowly, the transport stops pulling and the producer blocks.
+    - `is_disconnected` is polled every `disconnect_check_interval` seconds,
+      not per event; a comment line is sent after `heartbeat` idle seconds.
+    - Every event gets an increasing `id`, and the first one carries `retry`.
+    """
+
+    def __init__(self, flush_window: float = SSE_FLUSH_WINDOW, max_batch_bytes: int = SSE_MAX_BATCH_BYTES,
+                 queue_size: int = SSE_QUEUE_SIZE, retry: int | None = SSE_RETRY_MS,
+                 disconnect_check_interval: float = SSE_DISCONNECT_CHECK_INTERVAL, heartbeat: float = SSE_HEARTBEAT):
+        self.flush_window = flush_window
+        self.max_batch_bytes = max_batch_bytes
+        self.queue_size = queue_size
+        self.retry = retry
+        self.disconnect_check_interval = disconnect_check_interval
+        self.heartbeat = heartbeat
+
+    async def _produce(self, events, queue: asyncio.Queue, first_id: int) -> None:
+        event_id = first_id
+        try:
+            async for event, data in events:
+                retry = self.retry if event_id == first_id else None
+                await queue.put(encode_event(data, event=event, id=event_id, retry=retry))
+                event_id += 1
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(_END)
+
+    async def stream(self, events, is_disconnected=None, first_id: int = 0):
+        """Async iterator of SSE bytes for `events`; stops early if the client disconnected."""
+        queue = asyncio.Queue(self.queue_size)
+        producer = asyncio.create_task(self._produce(events, queue, first_id))
+        loop = asyncio.get_running_loop()
+        last_write = last_check = -float("inf")
+        idle_timeout = min(self.heartbeat, self.disconnect_check_interval)
+        try:
+            done = False
+            while not done:
+                if is_disconnected and loop.time() - last_check >= self.disconnect_check_interval:
+                    last_check = loop.time()
+                    if await is_disconnected():
+                        logger.info("SSE client disconnected, stopping stream")
+                        return
+                try:
+                    item = await asyncio.wait_for(queue.get(), idle_timeout)
+                except asyncio.TimeoutError:
+                    if loop.time() - last_write >= self.heartbeat:
+                        last_write = loop.time()
+                        yield _KEEP_ALIVE
+                    continue
+
+                batch, size = [], 0
+                # Coalesce only when the previous write was recent; an event after a pause goes out at once
+                deadline = last_write + self.flush_window
+                while True:
+                    if item is _END:
+                        done = True
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    batch.append(item)
+                    size += len(item)
+                    if size >= self.max_batch_bytes:
+                        break
+                    try:
+                        item = queue.get_nowait()
+                        continue
+                    except asyncio.QueueEmpty:
+                        pass
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if batch:
+                    last_write = loop.time()
+                    yield b"".join(batch)
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+sse_encoder = SSEEncoder()
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from mcp.types import (
+    PromptListChangedNotification,
+    ResourceListChangedNotification,
+    ServerNotification,
+    ToolListChangedNotification,
+)
+from mcp_use.adapters.langchain_adapter import LangChainAdapter
+
+logger = logging.getLogger(__name__)
+
+MCP_TOOL_CACHE_TTL = float(os.getenv("MCP_TOOL_CACHE_TTL", "300"))
+
+_LIST_CHANGED = (ToolListChangedNotification, ResourceListChangedNotification, PromptListChangedNotification)
+
+
+def schema_hash(tools, resources, prompts) -> str:
+    """Hash of everything the LangChain tools are built from."""
+    payload = [[item.model_dump(mode="json", exclude_none=True) for item in items]
+               for items in (tools, resources, prompts)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class _Entry:
+    def __init__(self, schema_hash: str, tool_classes: list, expires_at: float):
+        self.schema_hash = schema_hash
+        self.tool_classes = tool_classes  # (MCP tool name or None, BaseTool subclass)
+        self.expires_at = expires_at
+
+
+class ToolSchemaCache:
+    """
+    Process-wide cache of the LangChain tool classes built from an MCP
+    server's tools, resources and prompts, keyed by server URL and schema hash.
+
+    Agents get fresh tool instances bound to their own connector without a
+    tools/list round trip. An entry is re-listed after `ttl` seconds or when
+    the server sends a list-changed notification; if the schema hash is
+    unchanged the existing classes are kept.
+    """
+
+    def __init__(self, ttl: float = MCP_TOOL_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: dict[str, _Entry] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._stats = {"hits": 0, "refreshes": 0, "rebuilds": 0, "invalidations": 0}
+
+    def invalidate(self, url: str | None = None) -> None:
+        """Force the next lookup for `url` (or every server) to re-list."""
+        for key, entry in self._entries.items():
+            if url is None or key == url:
+                entry.expires_at = 0.0
+                self._stats["invalidations"] += 1
+
+    def message_handler(self, url: str):
+        """MCPClient `message_handler` that invalidates `url` on list-changed notifications."""
+        url = url.rstrip("/")
+
+        async def handle(message) -> None:
+            if isinstance(message, ServerNotification) and isinstance(message.root, _LIST_CHANGED):
+                logger.info("MCP server %s changed its tool list, invalidating cached schemas", url)
+                self.invalidate(url)
+        return handle
+
+    async def _refresh(self, url: str, connector) -> _Entry:
+        tools = await connector.list_tools()
+        resources = await connector.list_resources() or []
+        prompts = await connector.list_prompts() or []
+        digest = schema_hash(tools, resources, prompts)
+        self._stats["refreshes"] += 1
+
+        entry = self._entries.get(url)
+        if entry is not None and entry.schema_hash == digest:
+            entry.expires_at = time.monotonic() + self.ttl
+            return entry
+
+        # Classes are built without a connector; each agent binds its own
+        adapter = LangChainAdapter()
+        tool_classes = [(tool.name, type(adapter._convert_tool(tool, None))) for tool in tools]
+        tool_classes += [(None, type(adapter._convert_resource(resource, None))) for resource in resources]
+        tool_classes += [(None, type(adapter._convert_prompt(prompt, None))) for prompt in prompts]
+        self._stats["rebuilds"] += 1
+        logger.info("Cached %d tool(s) from %s (schema %s)", len(tool_classes), url, digest[:12])
+        entry = self._entries[url] = _Entry(digest, tool_classes, time.monotonic() + self.ttl)
+        return entry
+
+    async def tools_for(self, connector, disallowed_tools=()) -> list:
+        """LangChain tools for `connector`, built from the cached classes."""
+        url = connector.base_url
+        entry = self._entries.get(url)
+        if entry is None or entry.expires_at <= time.monotonic():
+            lock = self._locks.setdefault(url, asyncio.Lock())
+            async with lock:
+                entry = self._entries.get(url)
+                if entry is None or entry.expires_at <= time.monotonic():
+                    entry = await self._refresh(url, connector)
+                else:
+                    self._stats["hits"] += 1
+        else:
+            self._stats["hits"] += 1
+        return [cls(tool_connector=connector) for name, cls in entry.tool_classes if name not in disallowed_tools]
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "servers": {url: {"schema_hash": entry.schema_hash, "tools": len(entry.tool_classes),
+                              "expires_in": max(entry.expires_at - time.monotonic(), 0.0)}
+                        for url, entry in self._entries.items()},
+        }
+
+
+tool_schema_cache = ToolSchemaCache()
+
+
+class CachedToolsAdapter(LangChainAdapter):
+    """LangChainAdapter that takes HTTP connectors' tools from `tool_schema_cache`."""
+
+    async def load_tools_for_connector(self, connector):
+        if not hasattr(connector, "base_url"):
+            return await super().load_tools_for_connector(connector)
+        if connector not in self._connector_tool_map:
+            self._connector_tool_map[connector] = await tool_schema_cache.tools_for(connector, self.disallowed_tools)
+        return self._connector_tool_map[connector]
+
+
+def use_cached_tools(agent):
+    """Make `agent` build its tools from the process-wide schema cache."""
+    agent.adapter = CachedToolsAdapter(disallowed_tools=agent.disallowed_tools)
+    return agent